@@ -2,12 +2,18 @@ import random
 from math import ceil
 from random import randint
 
-from django.db.models import Sum
-from django.utils.timezone import now
+from django.db import transaction, IntegrityError
+from django.db.models import Sum, F, Prefetch, Count, Q
+from django.utils.timezone import now, localdate
 from rest_framework.exceptions import PermissionDenied, NotFound, ValidationError
 
-from main.models import UserLevelProgressRecord, World, Level, Section, Question, \
-    QuestionRecord, Answer
+from main.models import UserLevelProgressRecord, Level, Section, \
+    QuestionRecord, Answer, UserWorldScore, UserProgressCursor, UserCampaignScore, UserScoreBucket, StudentProfile
+from main.helper import is_counted_in_statistics, add_graded_attempts
+from main.leaderboard import invalidate_leaderboard
+from main.progression import get_progression_graph
+from main.question_pool import get_question_pool, get_answered_question_ids, invalidate_answered_question_ids, \
+    exclude_question_ids
 
 
 class GameManager:
@@ -32,17 +38,25 @@ class GameManager:
     def __init__(self, user):
         self.user = user
 
+        # State loaded during this request, kept in step with what this instance changes.
+        # A GameManager must not outlive the request it was created for.
+        self.__positions = {}  # cursor world id (None for campaign mode) -> (level, has completed world)
+        self.__points = {}  # world id -> points
+        self.__open_records = {}  # level id -> open question records of the level
+        self.__level_stats = {}  # level id -> question records count, points and correct answers of the level
+
+    def __reset_state(self):
+        self.__positions.clear()
+        self.__points.clear()
+        self.__open_records.clear()
+        self.__level_stats.clear()
+
     def __instantiate_position(self, world=None):
         # Sets the initial location
-
-        if not world or not world.is_custom_world:
-            level = Level.objects.filter(
-                section__world__is_custom_world=False
-            ).order_by('id')[0]
-        else:
-            level = Level.objects.filter(
-                section__world=world
-            ).order_by('id')[0]
+        level_id = get_progression_graph().get_first_level_id(world)
+        if level_id is None:
+            raise NotFound(detail="No level found for this world.")
+        level = Level.objects.select_related('section__world').get(id=level_id)
 
         UserLevelProgressRecord.objects.create(
             user=self.user,
@@ -51,7 +65,39 @@ class GameManager:
 
         return level
 
+    @staticmethod
+    def __cursor_world(world):
+        # Campaign progress is tracked across all the campaign worlds
+        if not world or not world.is_custom_world:
+            return None
+        return world
+
     def get_user_position_in_world(self, world=None, check_completed=False):
+        cursor_world = self.__cursor_world(world)
+        key = cursor_world.id if cursor_world else None
+        if key not in self.__positions:
+            cursor = UserProgressCursor.objects.select_related('level__section__world').filter(
+                user=self.user,
+                world=cursor_world,
+            ).first()
+
+            if not cursor:
+                # No cursor yet, derive it from the progress records
+                cursor = self.__load_cursor(world)
+            self.__positions[key] = (cursor.level, cursor.is_completed)
+
+        position, has_completed_world = self.__positions[key]
+        if check_completed:
+            return position, has_completed_world
+        else:
+            return position
+
+    def __load_cursor(self, world=None):
+        """
+        Creates the progress cursor of a world from the user's progress records.
+        :param world: the world object, None for campaign mode
+        :return: the UserProgressCursor object
+        """
         if not world or not world.is_custom_world:
             # Progress in main world
             progress = UserLevelProgressRecord.objects.filter(
@@ -81,26 +127,122 @@ class GameManager:
         else:
             position = a[0].level
 
-        if check_completed:
-            return position, has_completed_world
-        else:
-            return position
+        try:
+            with transaction.atomic():
+                cursor = UserProgressCursor.objects.create(
+                    user=self.user,
+                    world=self.__cursor_world(world),
+                    level=position,
+                    is_completed=has_completed_world,
+                )
+        except IntegrityError:
+            # Created concurrently by another request
+            cursor = UserProgressCursor.objects.select_related('level__section__world').get(
+                user=self.user,
+                world=self.__cursor_world(world),
+            )
+        return cursor
+
+    def __move_cursor(self, world, level, is_completed=False):
+        cursor_world = self.__cursor_world(world)
+        UserProgressCursor.objects.filter(
+            user=self.user,
+            world=cursor_world,
+        ).update(level=level, is_completed=is_completed, date_modified=now())
+        self.__positions[cursor_world.id if cursor_world else None] = (level, is_completed)
 
     def get_user_points_by_world(self, world):
         if not world:
             position = self.get_user_position_in_world()
             world = position.section.world
 
+        if world.id not in self.__points:
+            try:
+                points = UserWorldScore.objects.values_list('points', flat=True).get(user=self.user, world=world)
+            except UserWorldScore.DoesNotExist:
+                # No ledger entry yet, fall back to the raw records
+                score = self.__seed_world_score(world)
+                points = score.points if score else 0
+            self.__points[world.id] = points
+        return self.__points[world.id]
+
+    def __seed_world_score(self, world):
+        """
+        Creates the score ledger entry of a world from the user's question records.
+        :param world: the world object
+        :return: the UserWorldScore object, or None if the user has no record in this world
+        """
         records = QuestionRecord.objects.filter(
             user=self.user,
             level__section__world=world,
         )
-        if not records:
-            points = 0
-        else:
-            points = records.aggregate(Sum('points_change'))
-            points = points['points_change__sum']
-        return points
+        points = records.aggregate(Sum('points_change'))['points_change__sum']
+        if points is None:
+            # Never played in this world
+            return None
+
+        try:
+            with transaction.atomic():
+                score, created = UserWorldScore.objects.get_or_create(
+                    user=self.user,
+                    world=world,
+                    defaults={"points": points},
+                )
+        except IntegrityError:
+            # Seeded concurrently by another request
+            score = UserWorldScore.objects.get(user=self.user, world=world)
+        return score
+
+    def __add_to_score_bucket(self, world, day, points):
+        """
+        Adds points to the user's daily score bucket of a world, for the time-windowed leaderboards.
+        :param world: the world object
+        :param day: date the points were earned on
+        :param points: points to add
+        :return: Nothing
+        """
+        bucket = UserScoreBucket.objects.filter(
+            user=self.user,
+            world=world,
+            period=UserScoreBucket.DAY,
+            start=day,
+        )
+        if bucket.update(points_earned=F('points_earned') + points):
+            return
+
+        try:
+            with transaction.atomic():
+                UserScoreBucket.objects.create(
+                    user=self.user,
+                    world=world,
+                    period=UserScoreBucket.DAY,
+                    start=day,
+                    points_earned=points,
+                )
+        except IntegrityError:
+            # Created concurrently by another request
+            bucket.update(points_earned=F('points_earned') + points)
+
+    def __seed_campaign_score(self):
+        """
+        Creates the campaign score ledger entry from the user's question records in all the campaign worlds.
+        :return: the UserCampaignScore object
+        """
+        points = QuestionRecord.objects.filter(
+            user=self.user,
+            level__section__world__is_custom_world=False,
+        ).aggregate(Sum('points_change'))['points_change__sum'] or 0
+
+        try:
+            with transaction.atomic():
+                score, created = UserCampaignScore.objects.get_or_create(
+                    user=self.user,
+                    defaults={"points": points},
+                )
+        except IntegrityError:
+            # Seeded concurrently by another request
+            score = UserCampaignScore.objects.get(user=self.user)
+        return score
 
     def get_qn_difficulty_by_world(self, world):
         if not world:
@@ -121,14 +263,23 @@ class GameManager:
 
         return difficulty
 
-    def __new_boss_question_record_session(self, level, questions):
-        records = QuestionRecord.objects.filter(
-            user=self.user,
-            level=level,
-        )
+    def __get_open_records(self, level):
+        """
+        :param level: the level object
+        :return: list of the open question records of the level, with their question and answers loaded
+        """
+        if level.id not in self.__open_records:
+            self.__open_records[level.id] = list(QuestionRecord.objects.filter(
+                user=self.user,
+                level=level,
+                is_completed=False,
+            ).select_related('question').prefetch_related(
+                Prefetch('question__answers', queryset=Answer.objects.order_by('id'))
+            ).order_by('id'))
+        return self.__open_records[level.id]
 
-        # completed = records.filter(is_completed=True)
-        uncompleted = records.filter(is_completed=False)
+    def __new_boss_question_record_session(self, level):
+        uncompleted = self.__get_open_records(level)
 
         if uncompleted and len(uncompleted) != self.boss_level_qn:
             raise ValidationError(detail="Database data mismatch, please contact Admin.")
@@ -138,117 +289,146 @@ class GameManager:
             level=level,
             is_completed=False
         )
-        if not progress:
+        if not progress.exists():
             raise PermissionDenied(detail="You are not allowed to get questions, world completed.")
 
-        record_list = []
         if not uncompleted:
-            for question in questions:
-                record = QuestionRecord.objects.create(
+            # Only pick questions when there is no session in progress
+            QuestionRecord.objects.bulk_create([
+                QuestionRecord(
                     user=self.user,
                     level=level,
-                    question=question,
+                    question_id=question_id,
                 )
-                record_list.append(record)
-            return record_list
-        else:
-            return list(uncompleted)
+                for question_id in self.__pick_boss_question_ids(level)
+            ])
+            # Read back for the ids, bulk_create does not set them on every database
+            del self.__open_records[level.id]
+            self.__level_stats.pop(level.id, None)
+            uncompleted = self.__get_open_records(level)
+
+        return uncompleted
+
+    def __new_question_record_session(self, level):
+        open_records = self.__get_open_records(level)
+        if open_records:
+            # Uncompleted question for this level
+            return open_records[0]
 
-    def __new_question_record_session(self, level, question):
-        records = QuestionRecord.objects.filter(
+        has_records = QuestionRecord.objects.filter(
             user=self.user,
             level=level,
-        )
-
-        if not records:
-            # Only generate a new session if there is no unanswered question in the world
-            record = QuestionRecord.objects.create(
-                user=self.user,
-                level=level,
-                question=question,
-            )
-        else:
-            # Uncompleted question for this level
-            records = records.filter(is_completed=False)
-            if records:
-                record = records[0]
-            else:
-                progress = UserLevelProgressRecord.objects.filter(
-                    user=self.user,
-                    level=level,
-                    is_completed=False
-                )
-                if progress:
-                    # Generate a question session if there is uncompleted progress for this level
-                    record = QuestionRecord.objects.create(
-                        user=self.user,
-                        level=level,
-                        question=question,
-                    )
-                else:
-                    record = None
+        ).exists()
+        has_progress = UserLevelProgressRecord.objects.filter(
+            user=self.user,
+            level=level,
+            is_completed=False
+        ).exists()
+        if has_records and not has_progress:
+            # Level completed
+            return None
 
+        # Only generate a new session if there is no unanswered question in the level
+        record = QuestionRecord.objects.create(
+            user=self.user,
+            level=level,
+            question_id=self.__pick_question_id(level),
+        )
+        open_records.append(record)
+        self.__level_stats.pop(level.id, None)
         return record
 
     def __unlock_level(self, world=None):
         position = self.get_user_position_in_world(world)
-        levels = Level.objects.filter(id__gt=position.id, section=position.section).order_by('id')
-        if not levels:
-            if not position.section.world.is_custom_world:
-                # Main world logic
-                # Try the next section
-                next_section = Section.objects.filter(id__gt=position.section.id, world__is_custom_world=False)
-                if not next_section:
-                    # Try the next world
-                    next_world = World.objects.filter(id__gt=position.section.world.id, is_custom_world=False)
-                    if not next_world:
-                        # User has finished the main world
-                        return None
-                    else:
-                        next_section = Section.objects.filter(world=next_world[0]).order_by('id')
-                        if next_section:
-                            next_section = next_section[0]
-                        else:
-                            # World is empty :(
-                            return None
-                else:
-                    next_section = next_section[0]
-
-                next_level = Level.objects.filter(section=next_section).order_by('id')[0]
-            else:
-                # Custom world.
-                # User has finished the custom world
-                return None
-        else:
-            next_level = levels[0]
+        next_level = self.__find_next_level(position)
+        if not next_level:
+            # User has finished the main world / custom world
+            self.__move_cursor(world, position, is_completed=True)
+            return None
 
         UserLevelProgressRecord.objects.create(
             user=self.user,
             level=next_level,
         )
+        self.__move_cursor(world, next_level)
 
         return next_level
 
+    @staticmethod
+    def __find_next_level(position):
+        next_level_id = get_progression_graph().get_next_level_id(position.id)
+        if next_level_id is None:
+            # User has finished the main world / custom world
+            return None
+
+        return Level.objects.select_related('section__world').get(id=next_level_id)
+
     def __check_answer(self, question, answer):
-        if answer.question != question:
+        if answer.question_id != question.id:
             raise PermissionDenied(detail="One or more answers does not belong to their respective question.")
 
         return answer.is_correct
 
-    def __award_points(self, question_record, is_correct, points):
+    def __award_points(self, graded_records):
         """
-        :param question_record: The question record object
-        :param points: Points change
+        :param graded_records: List of (question record, is correct, points change) of the same level
         :return: Nothing
 
-        Sets the points for answering question and marks the question record completed
+        Sets the points for answering the questions and marks the question records completed, in a single update.
+        Must be called inside the grading transaction.
         """
-
-        question_record.is_completed = True
-        question_record.points_change = points
-        question_record.completed_time = now()
-        question_record.is_correct = is_correct
-        question_record.save()
+        completed_time = now()
+        records = []
+        total_points = 0
+        for question_record, is_correct, points in graded_records:
+            question_record.is_completed = True
+            question_record.points_change = points
+            question_record.completed_time = completed_time
+            question_record.is_correct = is_correct
+            records.append(question_record)
+            total_points += points
+
+        QuestionRecord.objects.bulk_update(records, ['is_completed', 'points_change', 'completed_time', 'is_correct'])
+        self.__open_records.pop(records[0].level_id, None)
+        self.__level_stats.pop(records[0].level_id, None)
+
+        world = records[0].level.section.world
+        if any(is_correct for _, is_correct, _ in graded_records):
+            # Exclude the questions from now on, once the grading is committed
+            transaction.on_commit(lambda: invalidate_answered_question_ids(self.user.id, world.id))
+
+        # Keep the score ledger in step with the records
+        updated = UserWorldScore.objects.filter(
+            user=self.user,
+            world=world,
+        ).update(points=F('points') + total_points)
+        if updated:
+            if world.id in self.__points:
+                self.__points[world.id] += total_points
+        else:
+            # Seeding sums the records, which already include these ones
+            self.__points[world.id] = self.__seed_world_score(world).points
+        self.__add_to_score_bucket(world, localdate(completed_time), total_points)
+
+        # Statistics dashboards, updated after the commit so that the rows shared by the Class are not locked along
+        # with the rows of the Student. Run rebuild_statistics if an update is lost
+        if is_counted_in_statistics(self.user):
+            class_id = StudentProfile.objects.filter(student=self.user).values_list('class_group_id', flat=True).first()
+            section_id = records[0].level.section_id
+            graded_attempts = [
+                (question_record.question_id, is_correct, points)
+                for question_record, is_correct, points in graded_records
+            ]
+            transaction.on_commit(lambda: add_graded_attempts(class_id, section_id, graded_attempts))
+        # Drop the cached leaderboard pages once the new scores are visible
+        transaction.on_commit(lambda: invalidate_leaderboard(world))
+
+        if not world.is_custom_world:
+            # Overall campaign leaderboard
+            updated = UserCampaignScore.objects.filter(user=self.user).update(points=F('points') + total_points)
+            if not updated:
+                self.__seed_campaign_score()
+            transaction.on_commit(invalidate_leaderboard)
 
     def complete_level(self, level):
         """
@@ -256,17 +436,50 @@ class GameManager:
         :param level: the level object
         :return:
         """
-        progress = UserLevelProgressRecord.objects.get(
+        with transaction.atomic():
+            progress = UserLevelProgressRecord.objects.select_for_update().get(
+                user=self.user,
+                level=level,
+            )
+            progress.is_completed = True
+            progress.completed_time = now()
+            progress.save()
+
+            # Unlock the next level
+            return self.__unlock_level(level.section.world)
+
+    def __lock_open_records(self, question_answer_set):
+        """
+        Locks the progress of the level being answered and its open question records, so that concurrent
+        submissions of the same answers are graded only once.
+        :return: the level and a dict of record id -> locked open question record
+        """
+        level = question_answer_set[0]["question_record"].level
+
+        # Grade against the locked rows, not against anything read before the lock
+        self.__reset_state()
+
+        # Lock order: progress first, then records
+        list(UserLevelProgressRecord.objects.select_for_update().filter(
             user=self.user,
             level=level,
-        )
-        progress.is_completed = True
-        progress.completed_time = now()
-        progress.save()
+        ))
+        open_records = QuestionRecord.objects.select_for_update().select_related(
+            'question', 'level__section__world',
+        ).filter(
+            user=self.user,
+            level=level,
+            is_completed=False,
+        ).in_bulk()
 
-        # Unlock the next level
-        return self.__unlock_level(level.section.world)
+        record_ids = [item["question_record"].id for item in question_answer_set]
+        if len(set(record_ids)) != len(record_ids):
+            raise ValidationError(detail="One or more question records is repeated.")
+        if any(record_id not in open_records for record_id in record_ids):
+            # Graded by a concurrent submission, or not from the same level
+            raise ValidationError(detail="One or more question records is completed.")
 
+        return level, open_records
 
     def answer_questions(self, question_answer_set):
 
@@ -277,17 +490,19 @@ class GameManager:
             if len(question_answer_set) != 1:
                 raise ValidationError(detail="Only one question can be checked at a time for normal levels.")
 
-            item = question_answer_set[0]
-            qr = item["question_record"]
+            with transaction.atomic():
+                level, open_records = self.__lock_open_records(question_answer_set)
+                item = question_answer_set[0]
+                qr = open_records[item["question_record"].id]
 
-            is_correct, points = self.__check_normal_level_answer(qr, item['answer'])
-            # Award the points
-            self.__award_points(qr, is_correct, points)
+                is_correct, points = self.__check_normal_level_answer(qr, item['answer'])
+                # Award the points
+                self.__award_points([(qr, is_correct, points)])
 
-            qn_index = self.__get_question_index(qr.level)
-            if qn_index == self.normal_level_qn - 1:
-                # Unlock the next level
-                self.complete_level(qr.level)
+                qn_index = self.__get_question_index(level)
+                if qn_index == self.normal_level_qn - 1:
+                    # Unlock the next level
+                    self.complete_level(level)
 
             res = [{
                 "record_id": qr.id,
@@ -302,42 +517,36 @@ class GameManager:
             if len(question_answer_set) != self.boss_level_qn:
                 raise ValidationError(detail=f"{self.boss_level_qn} answers needed for final boss level.")
 
-            unanswered_records = QuestionRecord.objects.filter(
-                user=self.user,
-                is_completed=False,
-                level=temp_qr.level
-            )
-
-            if len(unanswered_records) != self.boss_level_qn:
-                raise ValidationError(detail="Question record data mismatch! Contact admin immediately")
-
-            # Answer checking for boss level
-            correct_counter = 0
-            res = []
-            level = question_answer_set[0]["question_record"].level
-            for item in question_answer_set:
-                qr = item["question_record"]
-
-                is_correct = self.__check_boss_level_answer(qr, item['answer'])
-                correct_counter += 1 if is_correct else 0
-                temp = {
-                    "record_id": qr.id,
-                    "question_text": qr.question.question,
-                    "is_correct": is_correct,
-                    "points": 0
-                }
-                res.append(temp)
-
-            index = 0
-            # This is to ensure atomicity of data
-            for item in question_answer_set:
-                self.__award_points(item["question_record"], res[index]["is_correct"], res[index]["points"])
-                index += 1
-
-            # Must answer at least 5 questions correctly.
-            if correct_counter >= 5:
-                # Unlock the next level
-                self.complete_level(level)
+            with transaction.atomic():
+                level, open_records = self.__lock_open_records(question_answer_set)
+
+                if len(open_records) != self.boss_level_qn:
+                    raise ValidationError(detail="Question record data mismatch! Contact admin immediately")
+
+                # Answer checking for boss level
+                correct_counter = 0
+                res = []
+                graded_records = []
+                for item in question_answer_set:
+                    qr = open_records[item["question_record"].id]
+
+                    is_correct = self.__check_boss_level_answer(qr, item['answer'])
+                    correct_counter += 1 if is_correct else 0
+                    temp = {
+                        "record_id": qr.id,
+                        "question_text": qr.question.question,
+                        "is_correct": is_correct,
+                        "points": 0
+                    }
+                    res.append(temp)
+                    graded_records.append((qr, is_correct, 0))
+
+                self.__award_points(graded_records)
+
+                # Must answer at least 5 questions correctly.
+                if correct_counter >= 5:
+                    # Unlock the next level
+                    self.complete_level(level)
             return res
 
     def __check_normal_level_answer(self, question_record, answer):
@@ -356,59 +565,63 @@ class GameManager:
     def __check_boss_level_answer(self, question_record, answer):
         return self.__check_answer(question_record.question, answer)
 
-    def __get_question_index(self, position):
-        qr = QuestionRecord.objects.filter(
-            user=self.user,
-            level=position,
-        )
+    def __get_level_stats(self, level):
+        """
+        Counts the question records of the level in a single query, whatever the number of retries.
+        :return: dict of total (number of records), points and correct (number of correct answers)
+        """
+        if level.id not in self.__level_stats:
+            stats = QuestionRecord.objects.filter(
+                user=self.user,
+                level=level,
+            ).aggregate(
+                total=Count('id'),
+                points=Sum('points_change'),
+                correct=Count('id', filter=Q(is_correct=True)),
+            )
+            stats['points'] = stats['points'] or 0
+            self.__level_stats[level.id] = stats
+        return self.__level_stats[level.id]
 
-        return len(qr) - 1
+    def __get_question_index(self, position):
+        return self.__get_level_stats(position)['total'] - 1
 
-    def __get_single_question_set(self, position):
+    def __pick_question_id(self, position):
 
         section = position.section
 
         difficulty = self.get_qn_difficulty_by_world(section.world)
 
         # Get answered questions of user.
-        answered_question = QuestionRecord.objects \
-            .filter(user=self.user, is_correct=True) \
-            .values_list('question_id', flat=True)
+        answered_question = get_answered_question_ids(self.user.id, section.world_id)
 
         # Exclude the answered questions
-        pks = Question.objects.filter(
-            section=section,
-            difficulty=difficulty
-        ).exclude(
-            id__in=list(answered_question)
-        ).values_list('pk', flat=True)
+        pool = get_question_pool()
+        pks = exclude_question_ids(pool.get_question_ids(section.id, [difficulty]), answered_question)
 
         if len(pks) < 1:
             # Recycle questions that has been unanswered
-            pks = Question.objects.filter(section=section, difficulty=difficulty).values_list('pk', flat=True)
+            pks = pool.get_question_ids(section.id, [difficulty])
             if len(pks) < 1:
                 # Choose from all difficulties
-                pks = Question.objects.filter(
-                    section=section,
-                    difficulty__in=self.difficulty_points_map[True].keys()
-                ).values_list('pk', flat=True)
+                pks = pool.get_question_ids(section.id, list(self.difficulty_points_map[True].keys()))
 
         if len(pks) < 1:
             # If still no question, raise
             raise NotFound(detail="No question found for this world.")
 
         # Get random question of the processed list of questions
-        random_idx = randint(0, len(pks) - 1)
-        random_qn = Question.objects.get(pk=pks[random_idx])
+        return pks[randint(0, len(pks) - 1)]
 
+    def __get_single_question_set(self, position):
         # Add to question record
-        record = self.__new_question_record_session(position, random_qn)
+        record = self.__new_question_record_session(position)
         if not record:
             raise PermissionDenied(detail="You are not allowed to get question. World completed.")
         question = record.question
 
         # Get the answer for this question
-        answers = Answer.objects.filter(question=question)
+        answers = question.answers.all()
         qn_index = self.__get_question_index(position)
         res = [{
             "question": question,
@@ -418,26 +631,21 @@ class GameManager:
         }]
         return res
 
-    def __get_boss_level_question_answer(self, position):
+    def __pick_boss_question_ids(self, position):
         total_qn = self.boss_level_qn
         section_list = list(Section.objects.filter(world=position.section.world).values_list('id', flat=True))
         # Get answered questions of user.
-        answered_question = QuestionRecord.objects \
-            .filter(user=self.user, is_correct=True) \
-            .values_list('question_id', flat=True)
+        answered_question = get_answered_question_ids(self.user.id, position.section.world_id)
 
-        pks = Question.objects \
-            .filter(section__id__in=section_list) \
-            .exclude(id__in=list(answered_question)) \
-            .values_list('pk', flat=True)
-        pks = list(pks)
+        pool = get_question_pool()
+        all_pks = []
+        for section_id in section_list:
+            all_pks += pool.get_question_ids(section_id, list(self.difficulty_points_map[True].keys()))
+        pks = exclude_question_ids(all_pks, answered_question)
 
         # If unanswered question is less than 10
         if len(pks) < total_qn:
             diff = total_qn - len(pks)
-            all_pks = Question.objects \
-                .filter(section__id__in=section_list) \
-                .values_list('pk', flat=True)
 
             # If not enough questions
             if len(all_pks) < 1:
@@ -449,20 +657,16 @@ class GameManager:
 
             pks += to_add
 
-        random_qns = []
-        random_ids = random.sample(pks, k=total_qn)
-        for qn_id in random_ids:
-            qn = Question.objects.get(pk=qn_id)
-            random_qns.append(qn)
+        return random.sample(pks, k=total_qn)
 
-        records = self.__new_boss_question_record_session(level=position, questions=random_qns)
+    def __get_boss_level_question_answer(self, position):
+        records = self.__new_boss_question_record_session(level=position)
         res = []
         for item in records:
             question = item.question
-            answers = Answer.objects.filter(question=question)
             temp = {
                 "question": question,
-                "answers": answers,
+                "answers": question.answers.all(),
                 "record_id": item.id,
                 "index": None,
             }
@@ -470,17 +674,8 @@ class GameManager:
         return res
 
     def __get_question_session_stats(self, level):
-        records = QuestionRecord.objects.filter(
-            user=self.user,
-            level=level
-        )
-        total_score = 0
-        correct_counter = 0
-        for record in records:
-            total_score += record.points_change
-            correct_counter += 1 if record.is_correct else 0
-
-        return [total_score, correct_counter]
+        stats = self.__get_level_stats(level)
+        return [stats['points'], stats['correct']]
 
     def get_questions(self, world):
         position = self.get_user_position_in_world(world)
@@ -492,3 +687,36 @@ class GameManager:
         session_stats = self.__get_question_session_stats(position)
 
         return question_list, session_stats
+
+    def get_state(self, world, include_questions=False):
+        """
+        Returns the state of the user in a world in one go, without generating a question session.
+        :param world: the world object, None for campaign mode
+        :param include_questions: also return the question records left unanswered at the current level
+        :return: dict of position, has_completed_world, points, difficulty, session_stats and,
+        if include_questions, question_list
+        """
+        position, has_completed_world = self.get_user_position_in_world(world, check_completed=True)
+        if not world:
+            world = position.section.world
+
+        state = {
+            "position": position,
+            "has_completed_world": has_completed_world,
+            "points": self.get_user_points_by_world(world),
+            "difficulty": self.get_qn_difficulty_by_world(world),
+            "session_stats": self.__get_question_session_stats(position),
+        }
+
+        if include_questions:
+            question_list = []
+            for record in self.__get_open_records(position):
+                question_list.append({
+                    "question": record.question,
+                    "answers": record.question.answers.all(),
+                    "record_id": record.id,
+                    "index": None if position.is_final_boss_level else self.__get_question_index(position),
+                })
+            state["question_list"] = question_list
+
+        return state
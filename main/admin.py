@@ -1,12 +1,12 @@
 from django.contrib import admin, messages
-from django.http import HttpResponse
-from django.shortcuts import render, redirect
+from django.http import HttpResponse, JsonResponse, Http404
+from django.shortcuts import render, redirect, get_object_or_404
 from django.template import loader
 from django.urls import path
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin, Group, GroupAdmin
 
 from .forms import UploadCSVForm
-from .helper import calculate_world_statistics
+from .jobs import enqueue_job, get_job_result
 from .models import *
 from rest_framework.authtoken.models import Token
 
@@ -105,6 +105,25 @@ class QuestionAdmin(admin.ModelAdmin):
         return qs.exclude(created_by__in=superusers)
 
 
+@admin.register(QuestionAnalysis)
+class QuestionAnalysisAdmin(admin.ModelAdmin):
+    list_display = ('question', 'current_difficulty', 'suggested_difficulty', 'p_value', 'discrimination', 'attempts',
+                    'date_computed',)
+    list_filter = ('suggested_difficulty', 'question__difficulty', 'question__section',)
+    list_select_related = ('question',)
+    search_fields = ('question__question',)
+    readonly_fields = ('question', 'attempts', 'p_value', 'discrimination', 'suggested_difficulty', 'date_computed',)
+
+    def current_difficulty(self, obj):
+        return obj.question.get_difficulty_display()
+
+    def has_add_permission(self, request):
+        """
+        Analyses are computed by the analyse_questions command
+        """
+        return False
+
+
 @admin.register(CustomWorld)
 class CustomWorldAdmin(admin.ModelAdmin):
     exclude = ['index',]
@@ -195,42 +214,63 @@ class CustomAdminSite(admin.AdminSite):
         custom_urls = [
             path('campaign_statistics/', self.admin_view(self.campaign_statistics_view)),
             path('assignment_statistics/', self.admin_view(self.assignment_statistics_view)),
-            path('import-users/', self.admin_view(self.import_user_view))
+            path('import-users/', self.admin_view(self.import_user_view)),
+            path('jobs/<int:job_id>/', self.admin_view(self.job_progress_view)),
         ]
         return custom_urls + urls
 
+    def get_worlds_statistics(self, request, worlds, class_name):
+        """
+        Returns the statistics of Worlds computed in the background by the run_jobs worker, queueing their computation
+        if there are no recent ones, or if refresh is specified.
+        :return: list of the statistics of every World (None if they are not computed yet) and the Job computing them
+        """
+        params = {"world_ids": [world.id for world in worlds], "class_name": class_name or None}
+        if not request.GET.get("refresh"):
+            job = get_job_result("world_statistics", params)
+            if job:
+                return job.result, job
+        return None, enqueue_job("world_statistics", params, request.user)
+
+    def job_progress_view(self, request, job_id):
+        """
+        Returns the status and progress of a Job, for pages waiting on its result
+        """
+        job = get_object_or_404(Job, id=job_id)
+        return JsonResponse({
+            "status": job.get_status_display(),
+            "progress_done": job.progress_done,
+            "progress_total": job.progress_total,
+        })
+
     def campaign_statistics_view(self, request):
 
         """
         Retrieves the following statistics:
         - Per World in Campaign Mode, retrieve the average score (gained per Question in the Section) and total score per Section
         - Per Section, display each Question and the number of times it was answered correctly and incorrectly
+        - world is the name of the World, or All for every World, all computed in a single batch (default: first World)
         """
-        # campaign_mode_stats = []  # array of worlds and their stats
-        campaign_worlds = World.objects.filter(is_custom_world=False)
+        campaign_worlds = list(World.objects.filter(is_custom_world=False))
         world_name = request.GET.get("world")
         class_name = request.GET.get("class")
 
-        worlds = []
-        for world in campaign_worlds:
-            worlds.append(world.world_name)
-
-        if not world_name or world_name == worlds[0]: # get first world
-            world = World.objects.get(world_name=worlds[0])
-            current_world = worlds[0]
-        elif world_name == worlds[1]:
-            world = World.objects.get(world_name=worlds[1])
-            current_world = worlds[1]
-        elif world_name == worlds[2]:
-            world = World.objects.get(world_name=worlds[2])
-            current_world = worlds[2]
+        worlds = [world.world_name for world in campaign_worlds]
+        if world_name == "All":  # get all worlds
+            selected_worlds = campaign_worlds
+            current_world = "All"
         else:
-            raise Exception("Error occurred when retrieving world")
-
-        # campaign_mode_stats.append(calculate_world_statistics(world, class_name))
-
-        context = {"campaign_mode_stats": calculate_world_statistics(world, class_name),
-                   "worlds": worlds,
+            if not world_name and worlds:  # get first world
+                world_name = worlds[0]
+            selected_worlds = [world for world in campaign_worlds if world.world_name == world_name]
+            if not selected_worlds:
+                raise Http404("World does not exist")
+            current_world = world_name
+
+        campaign_mode_stats, job = self.get_worlds_statistics(request, selected_worlds, class_name)
+        context = {"campaign_mode_stats": campaign_mode_stats,
+                   "job": job,
+                   "worlds": ["All"] + worlds,
                    "current_world": current_world}
         if class_name:
             context["group"] = class_name
@@ -269,7 +309,9 @@ class CustomAdminSite(admin.AdminSite):
         # calculate stats for assignment custom world
         if access_code:
             custom_world = CustomWorld.objects.get(access_code=access_code)
-            context["custom_world_stats"] = calculate_world_statistics(custom_world, class_name)
+            custom_world_stats, context["job"] = self.get_worlds_statistics(request, [custom_world], class_name)
+            if custom_world_stats:
+                context["custom_world_stats"] = custom_world_stats[0]
 
             # set current_assignment for displaying in dropdown menu
             context["current_custom_world"] = {
@@ -362,6 +404,7 @@ custom_admin_site.register(User, UserAdmin)
 custom_admin_site.register(Token)
 custom_admin_site.register(Assignment, AssignmentAdmin)
 custom_admin_site.register(Question, QuestionAdmin)
+custom_admin_site.register(QuestionAnalysis, QuestionAnalysisAdmin)
 custom_admin_site.register(CustomWorld, CustomWorldAdmin)
 custom_admin_site.register(Section, SectionAdmin)
 custom_admin_site.register(World, WorldAdmin)
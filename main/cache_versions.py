@@ -0,0 +1,35 @@
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def _key(name):
+    return "version:%s" % name
+
+
+def get_cache_version_timeout():
+    """
+    Returns the timeout of the version stamps, and of the data cached along with them. With a cache local to each
+    process, stamps expire after CACHE_VERSION_TIMEOUT seconds, which bounds how long a process can miss the bumps of
+    the other processes. With a shared cache, they never expire.
+    """
+    if isinstance(caches['default'], LocMemCache):
+        return settings.CACHE_VERSION_TIMEOUT
+    return None
+
+
+def get_cache_version(name):
+    """
+    Returns the current version stamp of a cached data set, creating one if there is none yet.
+    Anything cached against an older stamp is stale.
+    """
+    return cache.get_or_set(_key(name), lambda: uuid4().hex, timeout=get_cache_version_timeout())
+
+
+def bump_cache_version(name):
+    """
+    Invalidates everything cached against the current version stamp of a data set.
+    """
+    cache.set(_key(name), uuid4().hex, timeout=get_cache_version_timeout())
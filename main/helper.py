@@ -1,23 +1,83 @@
-from django.db.models import Sum, Avg
-from main.models import Section, Level, StudentProfile, Class, QuestionRecord, Question, User
+from django.db import transaction, IntegrityError
+from django.db.models import Sum, F, Q
+from main.models import Section, Class, Question, QuestionStatistics, SectionStatistics
 
 
-def filter_question_records_by_class(class_name, question_records):
+def active_students(prefix="user__"):
     """
-    Function to filter question records by a specified class
+    Function to get the condition for rows belonging to an active Student, as a join on the User
+    :param prefix: lookup from the filtered model to the User, e.g. "user__" for question records
     """
-    class_group = Class.objects.get(class_name=class_name)
-    students = [student_profile.student for student_profile in
-                StudentProfile.objects.filter(class_group=class_group)]
-    return question_records.filter(user__in=students)
+    return Q(**{prefix + "is_active": True, prefix + "is_staff": False, prefix + "is_superuser": False})
 
 
-def remove_inactive_students(question_records):
+def students_in_classes(class_ids, prefix="user__"):
     """
-    Function to remove records belonging to an inactive Student
+    Function to get the condition for rows belonging to a Student of any of the given classes, as a join on the
+    Student's profile
+    :param class_ids: ids of the classes
+    :param prefix: lookup from the filtered model to the User, e.g. "user__" for question records
     """
-    active_students = User.objects.filter(is_staff=False, is_superuser=False, is_active=True)
-    return question_records.filter(user__in=active_students)
+    return Q(**{prefix + "student_profile__class_group_id__in": class_ids})
+
+
+def is_counted_in_statistics(user):
+    """
+    Function to check if the attempts of a User are counted in the statistics, only active Students are
+    """
+    return user.is_active and not user.is_staff and not user.is_superuser
+
+
+def _add_to_statistics(model, keys, attempts, num_correct, points):
+    rows = model.objects.filter(**keys)
+    changes = {
+        "attempts": F("attempts") + attempts,
+        "num_correct": F("num_correct") + num_correct,
+        "num_incorrect": F("num_incorrect") + attempts - num_correct,
+        "total_points": F("total_points") + points,
+    }
+    if rows.update(**changes):
+        return
+
+    try:
+        with transaction.atomic():
+            model.objects.create(
+                attempts=attempts,
+                num_correct=num_correct,
+                num_incorrect=attempts - num_correct,
+                total_points=points,
+                **keys
+            )
+    except IntegrityError:
+        # Created concurrently by another request
+        rows.update(**changes)
+
+
+def add_graded_attempts(class_id, section_id, graded_attempts):
+    """
+    Function to add graded attempts to the statistics of their Questions and Section, for the Class of the Student.
+    The rows are updated in question id order then the Section, so that concurrent updates never lock them in opposite
+    orders.
+    :param class_id: id of the Class of the Student, None if the Student is in no Class
+    :param section_id: id of the Section the attempts were made in
+    :param graded_attempts: list of (question id, is correct, points change)
+    """
+    question_totals = {}  # question id -> [attempts, correct, points]
+    for question_id, is_correct, points_change in graded_attempts:
+        totals = question_totals.setdefault(question_id, [0, 0, 0])
+        totals[0] += 1
+        totals[1] += int(is_correct)
+        totals[2] += points_change
+
+    with transaction.atomic():
+        for question_id in sorted(question_totals):
+            _add_to_statistics(QuestionStatistics, {"question_id": question_id, "class_group_id": class_id},
+                               *question_totals[question_id])
+
+        _add_to_statistics(SectionStatistics, {"section_id": section_id, "class_group_id": class_id},
+                           len(graded_attempts),
+                           sum(totals[1] for totals in question_totals.values()),
+                           sum(totals[2] for totals in question_totals.values()))
 
 
 def calculate_world_statistics(world, class_name=None):
@@ -26,50 +86,69 @@ def calculate_world_statistics(world, class_name=None):
     - total points in the Section
     - average points in the Section
     - for each Question in the Section, the number of correct and incorrect attempts
+    The statistics are read from the statistics rollups, summed up over all the Classes unless a Class is given.
+    """
+    return calculate_worlds_statistics([world], class_name)[0]
+
+
+def calculate_worlds_statistics(worlds, class_name=None):
+    """
+    Calculates the statistics of several Worlds at once, see calculate_world_statistics.
+    The same four queries are run whatever the number of Worlds.
+    :return: list of the statistics of every World, in the given order
     """
-    sections = Section.objects.filter(world=world)
-    sections_stats = []
-    for section in sections:
-        # calculate total and avg points
-        levels = Level.objects.filter(section=section)
-        question_records = QuestionRecord.objects.filter(level__in=levels)
-        question_records = remove_inactive_students(question_records)
-
-        # retrieve stats of students in given class, if any
-        if class_name:
-            question_records = filter_question_records_by_class(class_name, question_records)
-
-        if len(question_records) == 0:
+    world_ids = [world.id for world in worlds]
+    section_statistics = SectionStatistics.objects.filter(section__world_id__in=world_ids)
+    question_statistics = QuestionStatistics.objects.filter(question__section__world_id__in=world_ids)
+
+    # retrieve stats of students in given class, if any
+    if class_name:
+        class_group = Class.objects.get(class_name=class_name)
+        section_statistics = section_statistics.filter(class_group=class_group)
+        question_statistics = question_statistics.filter(class_group=class_group)
+
+    # total points and attempts of every section
+    section_points = {
+        row["section_id"]: row
+        for row in section_statistics
+            .values("section_id")
+            .annotate(total_points=Sum("total_points"), attempts=Sum("attempts"))
+            .order_by()
+    }
+
+    # correct and incorrect attempts of every question
+    question_counts = {
+        row["question_id"]: row
+        for row in question_statistics
+            .values("question_id")
+            .annotate(num_correct=Sum("num_correct"), num_incorrect=Sum("num_incorrect"))
+            .order_by()
+    }
+
+    questions_by_section = {}
+    for question in Question.objects.filter(section__world_id__in=world_ids).only("id", "section_id", "question"):
+        counts = question_counts.get(question.id, {})
+        questions_by_section.setdefault(question.section_id, []).append({
+            "question": question.question,
+            "num_correct": counts.get("num_correct", 0),
+            "num_incorrect": counts.get("num_incorrect", 0),
+        })
+
+    sections_stats_by_world = {world_id: [] for world_id in world_ids}
+    for section in Section.objects.filter(world_id__in=world_ids):
+        points = section_points.get(section.id)
+        if not points or not points["attempts"]:
             avg_points = 0
             total_points = 0
         else:
-            avg_points = round(question_records.aggregate(Avg('points_change'))["points_change__avg"], 2)
-            total_points = question_records.aggregate(Sum('points_change'))["points_change__sum"]
-
-        # get stats for each question in the section
-        questions_stats = []
-        questions = Question.objects.filter(section=section)
-        for question in questions:
-            question_record = QuestionRecord.objects.filter(question=question)
-            question_record = remove_inactive_students(question_record)
-
-            # retrieve stats of students in given class, if any
-            if class_name:
-                question_record = filter_question_records_by_class(class_name, question_record)
-
-            num_correct = len(question_record.filter(is_correct=True))
-            num_incorrect = len(question_record.filter(is_correct=False))
-            questions_stats.append({
-                "question": question.question,
-                "num_correct": num_correct,
-                "num_incorrect": num_incorrect,
-            })
-
-        sections_stats.append({
+            avg_points = round(points["total_points"] / points["attempts"], 2)
+            total_points = points["total_points"]
+
+        sections_stats_by_world[section.world_id].append({
             "sub_topic_name": section.sub_topic_name,
             "avg_points": avg_points,
             "total_points": total_points,
-            "questions": questions_stats
+            "questions": questions_by_section.get(section.id, [])
         })
 
-    return {"world_name": world.world_name, "sections": sections_stats}
+    return [{"world_name": world.world_name, "sections": sections_stats_by_world[world.id]} for world in worlds]
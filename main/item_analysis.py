@@ -0,0 +1,64 @@
+from math import ceil
+
+import numpy as np
+
+GROUP_SHARE = 0.27  # Share of Students in the upper and lower groups for the discrimination index
+EASY_P_VALUE = 0.7  # Questions answered correctly at least this often are suggested easy
+HARD_P_VALUE = 0.4  # Questions answered correctly less often than this are suggested hard
+
+
+def _share_correct(question_index, correct, num_questions):
+    # Share of correct attempts of every question, nan for questions without attempts
+    attempts = np.bincount(question_index, minlength=num_questions)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.bincount(question_index, weights=correct, minlength=num_questions) / attempts
+
+
+def analyse_items(user_ids, question_ids, is_correct, min_attempts=30):
+    """
+    Item analysis of Questions from graded attempts, computed on whole arrays at once.
+    - p_value: share of correct attempts of the Question
+    - discrimination: share of correct attempts by the upper group of Students minus by the lower group, the groups
+    being the 27% of Students (rounded up) with the most and with the least correct attempts overall, ties broken by
+    user id. nan if a group did not attempt the Question
+    - suggested_difficulty: "1" (easy), "2" (normal) or "3" (hard) from the p-value, "" for Questions with fewer than
+    min_attempts attempts
+    :param user_ids: array of the user id of every attempt
+    :param question_ids: array of the question id of every attempt
+    :param is_correct: array of whether every attempt is correct
+    :param min_attempts: number of attempts needed to suggest a difficulty
+    :return: dict of arrays with one entry per Question attempted: question_id, attempts, p_value, discrimination and
+    suggested_difficulty
+    """
+    questions, question_index = np.unique(question_ids, return_inverse=True)
+    users, user_index = np.unique(user_ids, return_inverse=True)
+    correct = np.asarray(is_correct, dtype=np.float64)
+
+    attempts = np.bincount(question_index, minlength=len(questions))
+    p_value = _share_correct(question_index, correct, len(questions))
+
+    # Ability of every Student, and the upper and lower groups
+    ability = np.bincount(user_index, weights=correct, minlength=len(users)) / np.bincount(user_index,
+                                                                                          minlength=len(users))
+    # Exactly the group size from each end of the ranking, however many Students are tied
+    group_size = ceil(GROUP_SHARE * len(users))
+    ranking = np.argsort(ability, kind='stable')
+    in_upper = np.zeros(len(users), dtype=bool)
+    in_upper[ranking[-group_size:]] = True
+    in_lower = np.zeros(len(users), dtype=bool)
+    in_lower[ranking[:group_size]] = True
+    upper = in_upper[user_index]
+    lower = in_lower[user_index]
+    discrimination = _share_correct(question_index[upper], correct[upper], len(questions)) \
+        - _share_correct(question_index[lower], correct[lower], len(questions))
+
+    suggested_difficulty = np.select([p_value >= EASY_P_VALUE, p_value >= HARD_P_VALUE], ["1", "2"], "3")
+    suggested_difficulty[attempts < min_attempts] = ""
+
+    return {
+        "question_id": questions,
+        "attempts": attempts,
+        "p_value": p_value,
+        "discrimination": discrimination,
+        "suggested_difficulty": suggested_difficulty,
+    }
@@ -0,0 +1,153 @@
+import json
+import traceback
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.utils.timezone import now
+
+from main.helper import calculate_worlds_statistics
+from main.models import Job, World
+
+RESULT_TIMEOUT = timedelta(minutes=5)  # Finished jobs are reused as results for this long
+RUNNING_TIMEOUT = timedelta(minutes=30)  # Running jobs are given up as failed after this long
+
+_handlers = {}
+
+
+def _get_key(kind, params):
+    return "%s:%s" % (kind, json.dumps(params, sort_keys=True))
+
+
+def register_job(kind):
+    """
+    Registers a function to run jobs of a kind. The function is called with the parameters of the job, and a
+    function to report the progress of the job with the number of steps done and the total number of steps.
+    It returns the result of the job, which must be serializable to JSON.
+    """
+    def register(handler):
+        _handlers[kind] = handler
+        return handler
+    return register
+
+
+def fail_stale_jobs():
+    """
+    Marks the jobs running for longer than RUNNING_TIMEOUT as failed, as their worker most likely died. Same jobs can
+    then be queued again.
+    :return: number of jobs marked as failed
+    """
+    return Job.objects.filter(status=Job.RUNNING, date_started__lt=now() - RUNNING_TIMEOUT).update(
+        status=Job.FAILED,
+        error="Job did not finish within %s, its worker stopped." % RUNNING_TIMEOUT,
+        date_finished=now(),
+    )
+
+
+def enqueue_job(kind, params, user=None):
+    """
+    Queues a job to be run by the ``run_jobs`` worker, unless the same job is already queued or running (and not
+    stale, see fail_stale_jobs).
+    :param kind: kind of job, as registered with register_job
+    :param params: dict of parameters of the job
+    :param user: the user queueing the job
+    :return: the Job object
+    """
+    if kind not in _handlers:
+        raise ValueError("Unknown job kind %s" % kind)
+
+    fail_stale_jobs()
+    key = _get_key(kind, params)
+    job = Job.objects.filter(key=key, status__in=[Job.QUEUED, Job.RUNNING]).first()
+    if job:
+        return job
+    return Job.objects.create(kind=kind, params=params, key=key, created_by=user)
+
+
+def get_job_result(kind, params):
+    """
+    :param kind: kind of job
+    :param params: dict of parameters of the job
+    :return: the latest Job of this kind with these parameters finished within RESULT_TIMEOUT, or None
+    """
+    return Job.objects.filter(
+        key=_get_key(kind, params),
+        status=Job.DONE,
+        date_finished__gte=now() - RESULT_TIMEOUT,
+    ).order_by('-date_finished').first()
+
+
+def claim_next_job():
+    """
+    Takes the oldest queued job for this worker. Workers claim a job by switching it from queued to running, so that
+    concurrent workers never run the same job.
+    :return: the claimed Job object, or None if no job is queued
+    """
+    while True:
+        job = Job.objects.filter(status=Job.QUEUED).order_by('id').first()
+        if job is None:
+            return None
+
+        claimed = Job.objects.filter(id=job.id, status=Job.QUEUED).update(status=Job.RUNNING, date_started=now())
+        if claimed:
+            job.refresh_from_db()
+            return job
+        # Claimed by another worker in the meantime
+
+
+def run_job(job):
+    """
+    Runs a claimed job, recording its progress and then its result, or the error it failed with.
+    :param job: the Job object
+    :return: Nothing
+    """
+    def report_progress(done, total):
+        Job.objects.filter(id=job.id).update(progress_done=done, progress_total=total)
+
+    try:
+        result = _handlers[job.kind](job.params, report_progress)
+    except Exception:
+        job.status = Job.FAILED
+        job.error = traceback.format_exc()
+    else:
+        job.status = Job.DONE
+        job.result = result
+    job.date_finished = now()
+    job.save(update_fields=['status', 'result', 'error', 'date_finished'])
+
+
+@register_job("world_statistics")
+def world_statistics_job(params, report_progress):
+    """
+    Calculates the statistics of Worlds in a single batch, see calculate_worlds_statistics.
+    Parameters: world_ids, and class_name (None for all Classes).
+    """
+    report_progress(0, 1)
+    worlds = World.objects.in_bulk(params["world_ids"])
+    result = calculate_worlds_statistics([worlds[world_id] for world_id in params["world_ids"]],
+                                         params.get("class_name"))
+    report_progress(1, 1)
+    return result
+
+
+@register_job("rebuild_score_ledger")
+def rebuild_score_ledger_job(params, report_progress):
+    """
+    Rebuilds the score ledger, see the rebuild_score_ledger command.
+    """
+    call_command("rebuild_score_ledger")
+
+
+@register_job("rebuild_statistics")
+def rebuild_statistics_job(params, report_progress):
+    """
+    Rebuilds the statistics rollups, see the rebuild_statistics command.
+    """
+    call_command("rebuild_statistics")
+
+
+@register_job("analyse_questions")
+def analyse_questions_job(params, report_progress):
+    """
+    Runs the item analysis of the Questions, see the analyse_questions command.
+    """
+    call_command("analyse_questions")
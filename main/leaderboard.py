@@ -0,0 +1,282 @@
+import csv
+import json
+from datetime import timedelta
+from hashlib import sha1
+from time import time
+
+from django.core.cache import cache
+from django.db.models import F, Q, Sum
+from django.utils.timezone import localdate
+
+from main.cache_versions import get_cache_version, bump_cache_version
+from main.helper import students_in_classes
+from main.models import UserWorldScore, UserCampaignScore, UserScoreBucket
+
+LEADERBOARD_CACHE_TIMEOUT = 30  # Seconds a cached page is served as is
+LEADERBOARD_STALE_TIMEOUT = 5 * 60  # Seconds a cached page may be served stale while it is rebuilt
+LEADERBOARD_REBUILD_TIMEOUT = 10  # Seconds before another request may try to rebuild a stale page
+CLASSES_CACHE_NAME = "leaderboard:classes"  # Bumped whenever Students move between Classes
+EXPORT_FIELDS = ['rank', 'user_id', 'first_name', 'last_name', 'points']
+EXPORT_CHUNK_SIZE = 2000  # Students read from the database at a time when exporting
+
+
+def _get_scores(world=None, class_ids=None, since=None):
+    if since:
+        # Daily buckets of the time window
+        scores = UserScoreBucket.objects.filter(period=UserScoreBucket.DAY, start__gte=since)
+        if world:
+            scores = scores.filter(world=world)
+        else:
+            scores = scores.filter(world__is_custom_world=False)
+    elif world:
+        scores = UserWorldScore.objects.filter(world=world)
+    else:
+        scores = UserCampaignScore.objects.all()
+    if class_ids is not None:
+        # Read through the Students of the Classes, rather than the whole leaderboard
+        scores = scores.filter(students_in_classes(class_ids))
+    if since:
+        scores = scores.values('user_id').annotate(points=Sum('points_earned'))
+    return scores
+
+
+def _ahead_of(points, user_id):
+    # Students ranked before the given leaderboard entry
+    return Q(points__gt=points) | Q(points=points, user_id__lt=user_id)
+
+
+def _behind(points, user_id):
+    # Students ranked after the given leaderboard entry
+    return Q(points__lt=points) | Q(points=points, user_id__gt=user_id)
+
+
+def _leaderboard_values(scores):
+    return scores.values(
+        'user_id',
+        'points',
+        first_name=F('user__first_name'),
+        last_name=F('user__last_name'),
+    )
+
+
+def get_ranking(world=None, class_ids=None, since=None):
+    """
+    Returns the leaderboard of a World, or the overall Campaign Mode leaderboard if no World is given, read from the
+    score ledger, or summed up from the daily score buckets of a time window. Students are ranked by points, then by
+    user id.
+    :param world: the world object, None for the overall campaign leaderboard
+    :param class_ids: ids of the Classes to rank the Students of, None to rank all Students
+    :param since: first day of the time window to rank the points earned in, None to rank all points
+    :return: queryset of dicts with user_id, first_name, last_name and points, in rank order
+    """
+    return _leaderboard_values(_get_scores(world, class_ids, since).order_by('-points', 'user_id'))
+
+
+def get_student_ranking(user_id, world=None, class_ids=None, since=None):
+    """
+    Returns the leaderboard entry of a single student. The rank is the number of students ahead of them plus one,
+    counted on the indexed points column, so the cost does not depend on the position in the leaderboard.
+    :param user_id: id of the student
+    :param world: the world object, None for the overall campaign leaderboard
+    :param class_ids: ids of the Classes to rank the Students of, None to rank all Students
+    :param since: first day of the time window to rank the points earned in, None to rank all points
+    :return: dict with user_id, first_name, last_name, points and rank, or None if the student is not on the leaderboard
+    """
+    student = get_ranking(world, class_ids, since).filter(user_id=user_id).first()
+    if not student:
+        return None
+
+    ahead = _get_scores(world, class_ids, since).filter(_ahead_of(student['points'], user_id)).count()
+    student['rank'] = ahead + 1
+    return student
+
+
+def encode_cursor(student):
+    """
+    :param student: leaderboard entry with its rank
+    :return: cursor to get the students ranked after this one
+    """
+    return "%s:%s:%s" % (student['rank'], student['points'], student['user_id'])
+
+
+def decode_cursor(cursor):
+    """
+    :param cursor: cursor made by encode_cursor
+    :return: tuple of rank, points and user id
+    :raises: ValueError if the cursor is invalid
+    """
+    rank, points, user_id = (int(value) for value in cursor.split(":"))
+    if rank < 1:
+        raise ValueError("Invalid rank in cursor")
+    return rank, points, user_id
+
+
+def get_ranking_page(limit, after=None, world=None, class_ids=None, since=None):
+    """
+    Returns a page of the leaderboard by keyset pagination, so that deep pages cost the same as the first one.
+    :param limit: maximum number of students to return
+    :param after: decoded cursor of the last student of the previous page, None for the first page
+    :param world: the world object, None for the overall campaign leaderboard
+    :param class_ids: ids of the Classes to rank the Students of, None to rank all Students
+    :param since: first day of the time window to rank the points earned in, None to rank all points
+    :return: list of dicts with user_id, first_name, last_name, points and rank
+    """
+    ranking = get_ranking(world, class_ids, since)
+    first_rank = 1
+    if after:
+        rank, points, user_id = after
+        ranking = ranking.filter(_behind(points, user_id))
+        first_rank = rank + 1
+
+    students = list(ranking[:limit])
+    for rank, student in enumerate(students, start=first_rank):
+        student['rank'] = rank
+    return students
+
+
+def get_ranking_around(user_id, window, world=None, class_ids=None, since=None):
+    """
+    Returns the students ranked right before and right after a student, along with the student.
+    :param user_id: id of the student
+    :param window: number of students to return on each side
+    :param world: the world object, None for the overall campaign leaderboard
+    :param class_ids: ids of the Classes to rank the Students of, None to rank all Students
+    :param since: first day of the time window to rank the points earned in, None to rank all points
+    :return: list of dicts with user_id, first_name, last_name, points and rank, or None if the student is not on the
+    leaderboard
+    """
+    student = get_student_ranking(user_id, world, class_ids, since)
+    if not student:
+        return None
+
+    scores = _get_scores(world, class_ids, since)
+    above = list(_leaderboard_values(
+        scores.filter(_ahead_of(student['points'], user_id)).order_by('points', '-user_id')
+    )[:window])
+    below = list(_leaderboard_values(
+        scores.filter(_behind(student['points'], user_id)).order_by('-points', 'user_id')
+    )[:window])
+
+    for rank, other in enumerate(above, start=1):
+        other['rank'] = student['rank'] - rank
+    for rank, other in enumerate(below, start=1):
+        other['rank'] = student['rank'] + rank
+
+    return above[::-1] + [student] + below
+
+
+def get_window_start(window):
+    """
+    :param window: "day" for today, or "week" for this week, starting on Monday
+    :return: first day of the time window
+    :raises: ValueError if the time window is unknown
+    """
+    today = localdate()
+    if window == "day":
+        return today
+    if window == "week":
+        return today - timedelta(days=today.weekday())
+    raise ValueError("Unknown time window %s" % window)
+
+
+def get_leaderboard_cache_name(world=None):
+    """
+    :param world: the world object, None for the overall campaign leaderboard
+    :return: name of the version stamp of the cached pages of the leaderboard
+    """
+    if world:
+        return "leaderboard:world:%s" % world.id
+    return "leaderboard:campaign"
+
+
+def invalidate_leaderboard(world=None):
+    """
+    Drops the cached pages of a leaderboard, to be called whenever a score in it changes.
+    :param world: the world object, None for the overall campaign leaderboard
+    """
+    bump_cache_version(get_leaderboard_cache_name(world))
+
+
+def get_cached_leaderboard(page, build, world=None, class_ids=None, since=None):
+    """
+    Returns a page of the leaderboard from the cache, building it if it is not cached yet.
+    A single request at a time rebuilds a page, when it is missing or older than LEADERBOARD_CACHE_TIMEOUT. The other
+    requests keep being served the stale page, or the last page built before the leaderboard changed, so that
+    expiring or invalidated pages do not send every request to the database at once.
+    :param page: string identifying the page within the leaderboard
+    :param build: function building the page
+    :param world: the world object, None for the overall campaign leaderboard
+    :param class_ids: ids of the Classes to rank the Students of, None to rank all Students
+    :param since: first day of the time window to rank the points earned in, None to rank all points
+    :return: the page, as returned by build
+    """
+    name = get_leaderboard_cache_name(world)
+    scope = page
+    if class_ids is not None:
+        scope += ":classes=%s" % sha1(",".join(map(str, sorted(class_ids))).encode()).hexdigest()
+    if since:
+        scope += ":since=%s" % since.isoformat()
+    key = "%s:%s:%s" % (name, get_cache_version(name), scope)
+    if class_ids is not None:
+        key += ":%s" % get_cache_version(CLASSES_CACHE_NAME)
+    latest_key = "%s:latest:%s" % (name, scope)  # Last page built, whatever the version
+
+    entry = cache.get(key)
+    if entry is not None and entry[0] > time():
+        return entry[1]
+    locked = cache.add(key + ":rebuild", True, LEADERBOARD_REBUILD_TIMEOUT)
+    if not locked:
+        # Being rebuilt by another request
+        if entry is not None:
+            return entry[1]
+        latest = cache.get(latest_key)
+        if latest is not None:
+            return latest
+
+    data = build()
+    cache.set(key, (time() + LEADERBOARD_CACHE_TIMEOUT, data), LEADERBOARD_STALE_TIMEOUT)
+    cache.set(latest_key, data, LEADERBOARD_STALE_TIMEOUT)
+    if locked:
+        cache.delete(key + ":rebuild")
+    return data
+
+
+class _Echo:
+    # File-like object handing back what the csv writer writes, instead of buffering it
+    def write(self, value):
+        return value
+
+
+def _iter_export_ranking(world=None, class_ids=None, since=None):
+    # Reads the leaderboard with a server-side cursor, one chunk at a time
+    students = get_ranking(world, class_ids, since).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    for rank, student in enumerate(students, start=1):
+        student['rank'] = rank
+        yield student
+
+
+def iter_ranking_csv(world=None, class_ids=None, since=None):
+    """
+    Generates the whole leaderboard as CSV, one line per student, without holding the leaderboard in memory.
+    :param world: the world object, None for the overall campaign leaderboard
+    :param class_ids: ids of the Classes to rank the Students of, None to rank all Students
+    :param since: first day of the time window to rank the points earned in, None to rank all points
+    :return: generator of CSV lines, starting with the header
+    """
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for student in _iter_export_ranking(world, class_ids, since):
+        yield writer.writerow([student[field] for field in EXPORT_FIELDS])
+
+
+def iter_ranking_ndjson(world=None, class_ids=None, since=None):
+    """
+    Generates the whole leaderboard as newline-delimited JSON, one object per student, without holding the leaderboard
+    in memory.
+    :param world: the world object, None for the overall campaign leaderboard
+    :param class_ids: ids of the Classes to rank the Students of, None to rank all Students
+    :param since: first day of the time window to rank the points earned in, None to rank all points
+    :return: generator of JSON lines
+    """
+    for student in _iter_export_ranking(world, class_ids, since):
+        yield json.dumps({field: student[field] for field in EXPORT_FIELDS}) + "\n"
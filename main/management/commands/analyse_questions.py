@@ -0,0 +1,61 @@
+from itertools import chain
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from main.helper import active_students
+from main.item_analysis import analyse_items
+from main.models import QuestionRecord, QuestionAnalysis
+
+CHUNK_SIZE = 10000  # Attempts read from the database at a time
+
+
+class Command(BaseCommand):
+    """
+    Runs the item analysis of every Question (p-value, discrimination index and suggested difficulty) on the graded
+    attempts of active Students, and saves it as QuestionAnalysis for review in the admin.
+    """
+    help = 'Computes the p-value, discrimination index and suggested difficulty of every attempted Question.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-attempts',
+            type=int,
+            default=30,
+            help='Number of attempts a Question needs for its difficulty to be suggested.',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("Loading attempts...")
+        rows = QuestionRecord.objects.filter(active_students(), is_completed=True) \
+            .values_list('user_id', 'question_id', 'is_correct') \
+            .order_by() \
+            .iterator(chunk_size=CHUNK_SIZE)
+        attempts = np.fromiter(chain.from_iterable(rows), dtype=np.int64).reshape(-1, 3)
+        if not len(attempts):
+            self.stdout.write(self.style.WARNING("No attempts to analyse"))
+            return
+
+        analysis = analyse_items(attempts[:, 0], attempts[:, 1], attempts[:, 2], options['min_attempts'])
+
+        with transaction.atomic():
+            QuestionAnalysis.objects.all().delete()
+            QuestionAnalysis.objects.bulk_create([
+                QuestionAnalysis(
+                    question_id=int(question_id),
+                    attempts=int(count),
+                    p_value=float(p_value),
+                    discrimination=None if np.isnan(discrimination) else float(discrimination),
+                    suggested_difficulty=suggested_difficulty or None,
+                )
+                for question_id, count, p_value, discrimination, suggested_difficulty in zip(
+                    analysis["question_id"],
+                    analysis["attempts"],
+                    analysis["p_value"],
+                    analysis["discrimination"],
+                    analysis["suggested_difficulty"],
+                )
+            ], batch_size=1000)
+        self.stdout.write(self.style.SUCCESS("...analysed %s questions from %s attempts"
+                                             % (len(analysis["question_id"]), len(attempts))))
@@ -0,0 +1,80 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils.timezone import localdate
+
+from main.models import UserScoreBucket
+
+
+class Command(BaseCommand):
+    """
+    Compacts the score buckets used by the time-windowed leaderboards. Daily buckets from before this week are rolled
+    up into weekly buckets, and weekly buckets from before last month into monthly buckets. A week is rolled up into
+    the month it starts in.
+    """
+    help = 'Compacts older daily score buckets into weekly buckets, and older weekly buckets into monthly buckets.'
+
+    def handle(self, *args, **options):
+        today = localdate()
+        week_start = today - timedelta(days=today.weekday())
+        last_month_start = (today.replace(day=1) - timedelta(days=1)).replace(day=1)
+
+        compacted = self.__compact(
+            UserScoreBucket.DAY,
+            UserScoreBucket.WEEK,
+            week_start,
+            lambda day: day - timedelta(days=day.weekday()),
+        )
+        self.stdout.write("Compacted %s daily buckets into weekly buckets" % compacted)
+
+        compacted = self.__compact(
+            UserScoreBucket.WEEK,
+            UserScoreBucket.MONTH,
+            last_month_start,
+            lambda day: day.replace(day=1),
+        )
+        self.stdout.write("Compacted %s weekly buckets into monthly buckets" % compacted)
+        self.stdout.write(self.style.SUCCESS("...score buckets compacted"))
+
+    @staticmethod
+    def __compact(period, into_period, before, get_start):
+        """
+        Rolls up the buckets of a period into buckets of a longer period.
+        :param period: period of the buckets to roll up
+        :param into_period: period of the buckets to roll them up into
+        :param before: only buckets starting before this date are rolled up
+        :param get_start: function returning the start of the longer period a bucket start falls in
+        :return: number of buckets rolled up
+        """
+        with transaction.atomic():
+            buckets = UserScoreBucket.objects.select_for_update().filter(period=period, start__lt=before)
+            compacted = 0
+            totals = {}  # (user id, world id, start) -> points
+            for user_id, world_id, start, points in buckets.values_list('user_id', 'world_id', 'start', 'points_earned'):
+                compacted += 1
+                key = (user_id, world_id, get_start(start))
+                totals[key] = totals.get(key, 0) + points
+            if not compacted:
+                return 0
+
+            # Add to the longer buckets already compacted before
+            existing = UserScoreBucket.objects.select_for_update().filter(
+                period=into_period,
+                start__in={start for _, _, start in totals},
+            )
+            updated = []
+            for bucket in existing:
+                key = (bucket.user_id, bucket.world_id, bucket.start)
+                if key in totals:
+                    bucket.points_earned += totals.pop(key)
+                    updated.append(bucket)
+            UserScoreBucket.objects.bulk_update(updated, ['points_earned'], batch_size=1000)
+
+            UserScoreBucket.objects.bulk_create([
+                UserScoreBucket(user_id=user_id, world_id=world_id, period=into_period, start=start, points_earned=points)
+                for (user_id, world_id, start), points in totals.items()
+            ], batch_size=1000)
+
+            UserScoreBucket.objects.filter(period=period, start__lt=before).delete()
+        return compacted
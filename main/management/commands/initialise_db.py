@@ -1,3 +1,4 @@
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import Permission
 from rest_framework.exceptions import PermissionDenied
@@ -41,6 +42,10 @@ class Command(BaseCommand):
         self.__create_demo_assignment()
         self.__simulate_demo_steve()
 
+        # Some of the records above are created directly, bypassing the GameManager
+        call_command('rebuild_score_ledger')
+        call_command('rebuild_statistics')
+
     def __create_superusers(self):
         """
         Method to create 4 superusers
@@ -0,0 +1,92 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Sum
+
+from main.leaderboard import invalidate_leaderboard
+from main.models import QuestionRecord, UserWorldScore, UserCampaignScore, World
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the score ledger (UserWorldScore per world and UserCampaignScore over campaign mode) from the raw
+    question records, or checks the ledger against them with --check.
+    """
+    help = 'Rebuilds the score ledger from question records. Use --check to only report mismatches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Compare the ledger against the question records without modifying it.',
+        )
+
+    def handle(self, *args, **options):
+        world_scores, campaign_scores = self.__expected_scores()
+
+        if options['check']:
+            actual_world_scores = {
+                (row['user_id'], row['world_id']): row['points']
+                for row in UserWorldScore.objects.values('user_id', 'world_id', 'points')
+            }
+            actual_campaign_scores = dict(UserCampaignScore.objects.values_list('user_id', 'points'))
+
+            mismatches = self.__check("world", world_scores, actual_world_scores)
+            mismatches += self.__check("campaign", campaign_scores, actual_campaign_scores)
+            if mismatches:
+                raise CommandError("%s score ledger entries do not match the question records." % mismatches)
+            self.stdout.write(self.style.SUCCESS("Score ledger matches the question records (%s entries)."
+                                                 % (len(actual_world_scores) + len(actual_campaign_scores))))
+        else:
+            self.__rebuild(world_scores, campaign_scores)
+
+    @staticmethod
+    def __expected_scores():
+        """
+        Sums up the points of every user in every world from the question records.
+        :return: dict of (user_id, world_id) -> points, and dict of user_id -> points over campaign mode
+        """
+        totals = QuestionRecord.objects \
+            .values('user_id', 'level__section__world_id', 'level__section__world__is_custom_world') \
+            .annotate(points=Sum('points_change')) \
+            .order_by()
+
+        world_scores = {}
+        campaign_scores = {}
+        for row in totals:
+            world_scores[(row['user_id'], row['level__section__world_id'])] = row['points']
+            if not row['level__section__world__is_custom_world']:
+                campaign_scores[row['user_id']] = campaign_scores.get(row['user_id'], 0) + row['points']
+
+        return world_scores, campaign_scores
+
+    def __check(self, name, expected, actual):
+        mismatches = 0
+        for key in sorted(set(expected) | set(actual)):
+            if expected.get(key) != actual.get(key):
+                mismatches += 1
+                self.stdout.write(
+                    "Mismatch in %s scores for %s: records=%s, ledger=%s"
+                    % (name, key, expected.get(key), actual.get(key))
+                )
+        return mismatches
+
+    def __rebuild(self, world_scores, campaign_scores):
+        self.stdout.write("Rebuilding score ledger...")
+        with transaction.atomic():
+            UserWorldScore.objects.all().delete()
+            UserWorldScore.objects.bulk_create([
+                UserWorldScore(user_id=user_id, world_id=world_id, points=points)
+                for (user_id, world_id), points in world_scores.items()
+            ], batch_size=1000)
+
+            UserCampaignScore.objects.all().delete()
+            UserCampaignScore.objects.bulk_create([
+                UserCampaignScore(user_id=user_id, points=points)
+                for user_id, points in campaign_scores.items()
+            ], batch_size=1000)
+
+        invalidate_leaderboard()
+        for world in World.objects.all():
+            invalidate_leaderboard(world)
+        self.stdout.write(self.style.SUCCESS("...score ledger rebuilt (%s entries)"
+                                             % (len(world_scores) + len(campaign_scores))))
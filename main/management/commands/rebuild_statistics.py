@@ -0,0 +1,98 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Sum, Count, Q
+
+from main.helper import active_students
+from main.models import QuestionRecord, QuestionStatistics, SectionStatistics
+
+STATISTICS_FIELDS = ['attempts', 'num_correct', 'num_incorrect', 'total_points']
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the statistics rollups (QuestionStatistics per Question and SectionStatistics per Section, for each Class)
+    from the graded question records of active Students, or checks the rollups against them with --check.
+    """
+    help = 'Rebuilds the statistics rollups from question records. Use --check to only report mismatches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Compare the statistics rollups against the question records without modifying them.',
+        )
+
+    def handle(self, *args, **options):
+        question_statistics = self.__expected_statistics('question_id')
+        section_statistics = self.__expected_statistics('level__section_id')
+
+        if options['check']:
+            mismatches = self.__check("question", question_statistics, self.__actual_statistics(
+                QuestionStatistics, 'question_id'))
+            mismatches += self.__check("section", section_statistics, self.__actual_statistics(
+                SectionStatistics, 'section_id'))
+            if mismatches:
+                raise CommandError("%s statistics rollup entries do not match the question records." % mismatches)
+            self.stdout.write(self.style.SUCCESS("Statistics rollups match the question records (%s entries)."
+                                                 % (len(question_statistics) + len(section_statistics))))
+        else:
+            self.__rebuild(question_statistics, section_statistics)
+
+    @staticmethod
+    def __expected_statistics(key):
+        """
+        Counts the graded attempts of active Students from the question records.
+        :param key: field of the question records to group by, with the Class of the Student
+        :return: dict of (key, class id) -> list of attempts, correct, incorrect and points
+        """
+        totals = QuestionRecord.objects.filter(active_students(), is_completed=True) \
+            .values(key, 'user__student_profile__class_group_id') \
+            .annotate(
+                attempts=Count('id'),
+                num_correct=Count('id', filter=Q(is_correct=True)),
+                num_incorrect=Count('id', filter=Q(is_correct=False)),
+                total_points=Sum('points_change'),
+            ) \
+            .order_by()
+
+        return {
+            (row[key], row['user__student_profile__class_group_id']): [row[field] for field in STATISTICS_FIELDS]
+            for row in totals
+        }
+
+    @staticmethod
+    def __actual_statistics(model, key):
+        return {
+            (row[key], row['class_group_id']): [row[field] for field in STATISTICS_FIELDS]
+            for row in model.objects.values(key, 'class_group_id', *STATISTICS_FIELDS)
+        }
+
+    def __check(self, name, expected, actual):
+        mismatches = 0
+        for key in sorted(set(expected) | set(actual), key=str):
+            if expected.get(key) != actual.get(key):
+                mismatches += 1
+                self.stdout.write(
+                    "Mismatch in %s statistics for %s: records=%s, rollup=%s"
+                    % (name, key, expected.get(key), actual.get(key))
+                )
+        return mismatches
+
+    def __rebuild(self, question_statistics, section_statistics):
+        self.stdout.write("Rebuilding statistics rollups...")
+        with transaction.atomic():
+            QuestionStatistics.objects.all().delete()
+            QuestionStatistics.objects.bulk_create([
+                QuestionStatistics(question_id=question_id, class_group_id=class_id,
+                                   **dict(zip(STATISTICS_FIELDS, values)))
+                for (question_id, class_id), values in question_statistics.items()
+            ], batch_size=1000)
+
+            SectionStatistics.objects.all().delete()
+            SectionStatistics.objects.bulk_create([
+                SectionStatistics(section_id=section_id, class_group_id=class_id,
+                                  **dict(zip(STATISTICS_FIELDS, values)))
+                for (section_id, class_id), values in section_statistics.items()
+            ], batch_size=1000)
+        self.stdout.write(self.style.SUCCESS("...statistics rollups rebuilt (%s entries)"
+                                             % (len(question_statistics) + len(section_statistics))))
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from main.jobs import claim_next_job, run_job, fail_stale_jobs
+from main.models import Job
+
+
+class Command(BaseCommand):
+    """
+    Runs the jobs queued in the database, such as the statistics of the admin dashboards. Any number of workers can
+    run side by side on the same database.
+    """
+    help = 'Runs queued jobs. Use --once to exit once the queue is empty.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once no job is queued, instead of waiting for new jobs.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1,
+            help='Seconds to wait before checking the queue again when it is empty.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            # Like a request, each iteration drops the connections that are broken or past CONN_MAX_AGE
+            close_old_connections()
+            fail_stale_jobs()
+            job = claim_next_job()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
+                continue
+
+            self.stdout.write("Running job %s (%s)..." % (job.id, job))
+            run_job(job)
+            if job.status == Job.DONE:
+                self.stdout.write(self.style.SUCCESS("...job %s done" % job.id))
+            else:
+                self.stdout.write(self.style.ERROR("...job %s failed:\n%s" % (job.id, job.error)))
@@ -0,0 +1,350 @@
+# Generated by Django 3.1.7 on 2026-10-18 10:15
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import main.models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Class',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('class_name', models.CharField(max_length=30)),
+                ('teacher', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='classes', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Level',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level_name', models.CharField(max_length=64)),
+                ('is_boss_level', models.BooleanField(default=False)),
+                ('is_final_boss_level', models.BooleanField(default=False)),
+                ('index', models.IntegerField(default=None, null=True, unique=True)),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('date_modified', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Question',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('question', models.TextField(max_length=1000)),
+                ('difficulty', models.CharField(choices=[('1', 'Easy'), ('2', 'Normal'), ('3', 'Hard')], help_text='1 (easy), 2 (normal), 3 (hard)', max_length=1)),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('date_modified', models.DateTimeField(auto_now=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='created_questions', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Section',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sub_topic_name', models.CharField(max_length=30)),
+                ('index', models.IntegerField(default=None, null=True, unique=True)),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('date_modified', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='World',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('world_name', models.CharField(max_length=64)),
+                ('topic', models.CharField(max_length=64)),
+                ('is_custom_world', models.BooleanField(default=False)),
+                ('index', models.IntegerField(default=None, null=True, unique=True)),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('date_modified', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CustomWorld',
+            fields=[
+                ('world_ptr', models.OneToOneField(auto_created=True, on_delete=django.db.models.deletion.CASCADE, parent_link=True, primary_key=True, serialize=False, to='main.world')),
+                ('access_code', models.CharField(default=main.models.generate_access_code, max_length=6, unique=True)),
+                ('is_active', models.BooleanField(default=True)),
+            ],
+            options={
+                'verbose_name': 'Custom World',
+                'verbose_name_plural': 'Custom Worlds',
+            },
+            bases=('main.world',),
+        ),
+        migrations.CreateModel(
+            name='UserWorldScore',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('points', models.IntegerField(default=0)),
+                ('date_modified', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='world_scores', to=settings.AUTH_USER_MODEL)),
+                ('world', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_scores', to='main.world')),
+            ],
+            options={
+                'verbose_name': 'User World Score',
+                'verbose_name_plural': 'User World Scores',
+            },
+        ),
+        migrations.CreateModel(
+            name='UserScoreBucket',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('D', 'Day'), ('W', 'Week'), ('M', 'Month')], default='D', max_length=1)),
+                ('start', models.DateField()),
+                ('points_earned', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_buckets', to=settings.AUTH_USER_MODEL)),
+                ('world', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_buckets', to='main.world')),
+            ],
+            options={
+                'verbose_name': 'User Score Bucket',
+                'verbose_name_plural': 'User Score Buckets',
+            },
+        ),
+        migrations.CreateModel(
+            name='UserProgressCursor',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_completed', models.BooleanField(default=False)),
+                ('date_modified', models.DateTimeField(auto_now=True)),
+                ('level', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress_cursors', to='main.level')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress_cursors', to=settings.AUTH_USER_MODEL)),
+                ('world', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='progress_cursors', to='main.world')),
+            ],
+            options={
+                'verbose_name': 'User Progress Cursor',
+                'verbose_name_plural': 'User Progress Cursors',
+            },
+        ),
+        migrations.CreateModel(
+            name='UserLevelProgressRecord',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_completed', models.BooleanField(default=False)),
+                ('started_time', models.DateTimeField(auto_now_add=True)),
+                ('completed_time', models.DateTimeField(blank=True, null=True)),
+                ('level', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_progress_record', to='main.level')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='level_progress_record', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UserCampaignScore',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('points', models.IntegerField(default=0)),
+                ('date_modified', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='campaign_score', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'User Campaign Score',
+                'verbose_name_plural': 'User Campaign Scores',
+            },
+        ),
+        migrations.CreateModel(
+            name='StudentProfile',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year_of_study', models.IntegerField()),
+                ('has_reset_password', models.BooleanField(default=False)),
+                ('class_group', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='students', to='main.class')),
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='student_profile', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Student Profile',
+                'verbose_name_plural': 'Student Profiles',
+            },
+        ),
+        migrations.CreateModel(
+            name='SectionStatistics',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts', models.IntegerField(default=0)),
+                ('num_correct', models.IntegerField(default=0)),
+                ('num_incorrect', models.IntegerField(default=0)),
+                ('total_points', models.IntegerField(default=0)),
+                ('class_group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='section_statistics', to='main.class')),
+                ('section', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='statistics', to='main.section')),
+            ],
+            options={
+                'verbose_name': 'Section Statistics',
+                'verbose_name_plural': 'Section Statistics',
+            },
+        ),
+        migrations.AddField(
+            model_name='section',
+            name='world',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sections', to='main.world'),
+        ),
+        migrations.CreateModel(
+            name='QuestionStatistics',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts', models.IntegerField(default=0)),
+                ('num_correct', models.IntegerField(default=0)),
+                ('num_incorrect', models.IntegerField(default=0)),
+                ('total_points', models.IntegerField(default=0)),
+                ('class_group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='question_statistics', to='main.class')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='statistics', to='main.question')),
+            ],
+            options={
+                'verbose_name': 'Question Statistics',
+                'verbose_name_plural': 'Question Statistics',
+            },
+        ),
+        migrations.CreateModel(
+            name='QuestionRecord',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_correct', models.BooleanField(blank=True, null=True)),
+                ('points_change', models.IntegerField(default=0)),
+                ('reason', models.CharField(blank=True, max_length=256, null=True)),
+                ('time', models.DateTimeField(auto_now_add=True)),
+                ('is_completed', models.BooleanField(default=False)),
+                ('completed_time', models.DateTimeField(blank=True, null=True)),
+                ('level', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='level_question_records', to='main.level')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='question_records', to='main.question')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_question_records', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='QuestionAnalysis',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts', models.IntegerField(default=0)),
+                ('p_value', models.FloatField()),
+                ('discrimination', models.FloatField(blank=True, null=True)),
+                ('suggested_difficulty', models.CharField(blank=True, choices=[('1', 'Easy'), ('2', 'Normal'), ('3', 'Hard')], max_length=1, null=True)),
+                ('date_computed', models.DateTimeField(auto_now=True)),
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='analysis', to='main.question')),
+            ],
+            options={
+                'verbose_name': 'Question Analysis',
+                'verbose_name_plural': 'Question Analyses',
+            },
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='section',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='questions', to='main.section'),
+        ),
+        migrations.AddField(
+            model_name='level',
+            name='section',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='levels', to='main.section'),
+        ),
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=50)),
+                ('params', models.JSONField(default=dict)),
+                ('key', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('Q', 'Queued'), ('R', 'Running'), ('D', 'Done'), ('F', 'Failed')], default='Q', max_length=1)),
+                ('progress_done', models.IntegerField(default=0)),
+                ('progress_total', models.IntegerField(default=0)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, default='')),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('date_started', models.DateTimeField(blank=True, null=True)),
+                ('date_finished', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Job',
+                'verbose_name_plural': 'Jobs',
+            },
+        ),
+        migrations.CreateModel(
+            name='Assignment',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=30)),
+                ('deadline', models.DateTimeField()),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('date_modified', models.DateTimeField(auto_now=True)),
+                ('class_group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='assignments', to='main.class')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Answer',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('answer', models.CharField(max_length=256)),
+                ('is_correct', models.BooleanField(default=False)),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('date_modified', models.DateTimeField(auto_now=True)),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='answers', to='main.question')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='userworldscore',
+            index=models.Index(fields=['world', '-points', 'user'], name='world_score_rank_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='userworldscore',
+            unique_together={('user', 'world')},
+        ),
+        migrations.AddIndex(
+            model_name='userscorebucket',
+            index=models.Index(fields=['period', 'start', 'world'], name='score_bucket_window_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='userscorebucket',
+            unique_together={('user', 'world', 'period', 'start')},
+        ),
+        migrations.AddConstraint(
+            model_name='userprogresscursor',
+            constraint=models.UniqueConstraint(fields=('user', 'world'), name='unique_user_world_cursor'),
+        ),
+        migrations.AddConstraint(
+            model_name='userprogresscursor',
+            constraint=models.UniqueConstraint(condition=models.Q(world__isnull=True), fields=('user',), name='unique_user_campaign_cursor'),
+        ),
+        migrations.AddIndex(
+            model_name='usercampaignscore',
+            index=models.Index(fields=['-points', 'user'], name='campaign_score_rank_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='sectionstatistics',
+            constraint=models.UniqueConstraint(fields=('section', 'class_group'), name='unique_section_class_statistics'),
+        ),
+        migrations.AddConstraint(
+            model_name='sectionstatistics',
+            constraint=models.UniqueConstraint(condition=models.Q(class_group__isnull=True), fields=('section',), name='unique_section_no_class_statistics'),
+        ),
+        migrations.AddConstraint(
+            model_name='questionstatistics',
+            constraint=models.UniqueConstraint(fields=('question', 'class_group'), name='unique_question_class_statistics'),
+        ),
+        migrations.AddConstraint(
+            model_name='questionstatistics',
+            constraint=models.UniqueConstraint(condition=models.Q(class_group__isnull=True), fields=('question',), name='unique_question_no_class_statistics'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['key', 'status'], name='job_key_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['status', 'id'], name='job_status_idx'),
+        ),
+        migrations.AddField(
+            model_name='customworld',
+            name='created_by',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='custom_worlds', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='assignment',
+            name='custom_world',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='main.customworld'),
+        ),
+    ]
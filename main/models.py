@@ -272,4 +272,223 @@ class StudentProfile(models.Model):
 
     class Meta:
         verbose_name = 'Student Profile'
-        verbose_name_plural = 'Student Profiles'
\ No newline at end of file
+        verbose_name_plural = 'Student Profiles'
+
+class UserWorldScore(models.Model):
+    """
+    Represents a Student's running total of points in a World. Kept in step with :model:`main.QuestionRecord`
+    by the GameManager when answers are graded, and rebuilt by the ``rebuild_score_ledger`` command.
+    Related to :model:`auth.User` and :model:`main.World`.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="world_scores")
+    world = models.ForeignKey(World, on_delete=models.CASCADE, related_name="user_scores")
+    points = models.IntegerField(default=0)
+    date_modified = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return "%s|%s|%s" % (self.user.first_name, self.world.world_name, self.points)
+
+    class Meta:
+        unique_together = [['user', 'world']]
+        indexes = [
+            # Leaderboard order
+            models.Index(fields=['world', '-points', 'user'], name='world_score_rank_idx'),
+        ]
+        verbose_name = 'User World Score'
+        verbose_name_plural = 'User World Scores'
+
+
+class UserCampaignScore(models.Model):
+    """
+    Represents a Student's running total of points over all the Worlds of Campaign Mode, for the overall leaderboard.
+    Maintained along with :model:`main.UserWorldScore`. Related to :model:`auth.User`.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="campaign_score")
+    points = models.IntegerField(default=0)
+    date_modified = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return "%s|%s" % (self.user.first_name, self.points)
+
+    class Meta:
+        indexes = [
+            # Leaderboard order
+            models.Index(fields=['-points', 'user'], name='campaign_score_rank_idx'),
+        ]
+        verbose_name = 'User Campaign Score'
+        verbose_name_plural = 'User Campaign Scores'
+
+
+class UserProgressCursor(models.Model):
+    """
+    Represents a User's current Level position in Campaign Mode (world is empty) or in a Custom World, so the position
+    can be read without going through the whole :model:`main.UserLevelProgressRecord` history.
+    Related to :model:`auth.User`, :model:`main.World` and :model:`main.Level`.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="progress_cursors")
+    world = models.ForeignKey(World, on_delete=models.CASCADE, related_name="progress_cursors", null=True, blank=True)
+    level = models.ForeignKey(Level, on_delete=models.CASCADE, related_name="progress_cursors")
+    is_completed = models.BooleanField(default=False)
+    date_modified = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return "%s|%s|%s" % (self.user.first_name, self.level.level_name, self.is_completed)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'world'], name='unique_user_world_cursor'),
+            models.UniqueConstraint(fields=['user'], condition=models.Q(world__isnull=True),
+                                    name='unique_user_campaign_cursor'),
+        ]
+        verbose_name = 'User Progress Cursor'
+        verbose_name_plural = 'User Progress Cursors'
+
+
+class UserScoreBucket(models.Model):
+    """
+    Represents the points a Student earned in a World over a day, a week or a month, for time-windowed leaderboards.
+    Daily buckets are added to by the GameManager when answers are graded, and compacted into weekly and monthly
+    buckets by the ``compact_score_buckets`` command. Related to :model:`auth.User` and :model:`main.World`.
+    """
+    DAY = "D"
+    WEEK = "W"
+    MONTH = "M"
+    PERIOD_CHOICES = [
+        (DAY, "Day"),
+        (WEEK, "Week"),
+        (MONTH, "Month"),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="score_buckets")
+    world = models.ForeignKey(World, on_delete=models.CASCADE, related_name="score_buckets")
+    period = models.CharField(max_length=1, choices=PERIOD_CHOICES, default=DAY)
+    start = models.DateField()  # First day of the period
+    points_earned = models.IntegerField(default=0)
+
+    def __str__(self):
+        return "%s|%s|%s %s|%s" % (self.user.first_name, self.world.world_name, self.get_period_display(), self.start,
+                                   self.points_earned)
+
+    class Meta:
+        unique_together = [['user', 'world', 'period', 'start']]
+        indexes = [
+            # Summing the buckets of a time window
+            models.Index(fields=['period', 'start', 'world'], name='score_bucket_window_idx'),
+        ]
+        verbose_name = 'User Score Bucket'
+        verbose_name_plural = 'User Score Buckets'
+
+
+class QuestionStatistics(models.Model):
+    """
+    Represents the graded attempts at a Question by the Students of a Class (or of no Class), for the statistics
+    dashboards. Kept in step with :model:`main.QuestionRecord` by the GameManager when answers are graded, and rebuilt
+    by the ``rebuild_statistics`` command. Related to :model:`main.Question` and :model:`main.Class`.
+    """
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name="statistics")
+    class_group = models.ForeignKey(Class, on_delete=models.CASCADE, related_name="question_statistics", null=True,
+                                    blank=True)
+    attempts = models.IntegerField(default=0)
+    num_correct = models.IntegerField(default=0)
+    num_incorrect = models.IntegerField(default=0)
+    total_points = models.IntegerField(default=0)
+
+    def __str__(self):
+        return "%s|%s|%s/%s" % (self.question, self.class_group, self.num_correct, self.attempts)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['question', 'class_group'], name='unique_question_class_statistics'),
+            models.UniqueConstraint(fields=['question'], condition=models.Q(class_group__isnull=True),
+                                    name='unique_question_no_class_statistics'),
+        ]
+        verbose_name = 'Question Statistics'
+        verbose_name_plural = 'Question Statistics'
+
+
+class SectionStatistics(models.Model):
+    """
+    Represents the graded attempts in a Section by the Students of a Class (or of no Class), for the statistics
+    dashboards. Maintained along with :model:`main.QuestionStatistics`. Related to :model:`main.Section` and
+    :model:`main.Class`.
+    """
+    section = models.ForeignKey(Section, on_delete=models.CASCADE, related_name="statistics")
+    class_group = models.ForeignKey(Class, on_delete=models.CASCADE, related_name="section_statistics", null=True,
+                                    blank=True)
+    attempts = models.IntegerField(default=0)
+    num_correct = models.IntegerField(default=0)
+    num_incorrect = models.IntegerField(default=0)
+    total_points = models.IntegerField(default=0)
+
+    def __str__(self):
+        return "%s|%s|%s" % (self.section, self.class_group, self.total_points)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['section', 'class_group'], name='unique_section_class_statistics'),
+            models.UniqueConstraint(fields=['section'], condition=models.Q(class_group__isnull=True),
+                                    name='unique_section_no_class_statistics'),
+        ]
+        verbose_name = 'Section Statistics'
+        verbose_name_plural = 'Section Statistics'
+
+
+class Job(models.Model):
+    """
+    Represents a job queued for the ``run_jobs`` worker, such as computing the statistics of a World, along with its
+    progress and its result. Related to :model:`auth.User`.
+    """
+    QUEUED = "Q"
+    RUNNING = "R"
+    DONE = "D"
+    FAILED = "F"
+    STATUS_CHOICES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    kind = models.CharField(max_length=50)
+    params = models.JSONField(default=dict)
+    key = models.CharField(max_length=255)  # Kind and parameters, to find the same job
+    status = models.CharField(max_length=1, choices=STATUS_CHOICES, default=QUEUED)
+    progress_done = models.IntegerField(default=0)
+    progress_total = models.IntegerField(default=0)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="jobs")
+    date_created = models.DateTimeField(auto_now_add=True)
+    date_started = models.DateTimeField(null=True, blank=True)
+    date_finished = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return "%s|%s|%s" % (self.kind, self.params, self.get_status_display())
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['key', 'status'], name='job_key_status_idx'),
+            models.Index(fields=['status', 'id'], name='job_status_idx'),
+        ]
+        verbose_name = 'Job'
+        verbose_name_plural = 'Jobs'
+
+
+class QuestionAnalysis(models.Model):
+    """
+    Represents the item analysis of a Question from the graded attempts of Students, for reviewing its difficulty.
+    Computed by the ``analyse_questions`` command. Related to :model:`main.Question`.
+    """
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, related_name="analysis")
+    attempts = models.IntegerField(default=0)
+    p_value = models.FloatField()  # Share of correct attempts
+    discrimination = models.FloatField(null=True, blank=True)  # Upper minus lower group share of correct attempts
+    suggested_difficulty = models.CharField(max_length=1, choices=Question.DIFFICULTY_CHOICES, null=True, blank=True)
+    date_computed = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return "%s|%s|%s" % (self.question, self.p_value, self.suggested_difficulty)
+
+    class Meta:
+        verbose_name = 'Question Analysis'
+        verbose_name_plural = 'Question Analyses'
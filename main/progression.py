@@ -0,0 +1,75 @@
+from django.db.models import F
+
+from main.cache_versions import get_cache_version
+from main.models import Level
+
+GRAPH_CACHE_NAME = "progression_graph"
+
+_graph = None
+
+
+class ProgressionGraph:
+    """
+    Maps every Level to the Level unlocked after it.
+
+    Campaign Mode levels form a single chain across all the campaign worlds, and the levels of each Custom World
+    form a chain of their own. Levels are ordered by the index of their World, Section and Level, falling back to
+    the id where no index is set.
+    """
+
+    def __init__(self, version):
+        self.version = version
+        self.next_levels = {}  # level id -> next level id, None for the last level
+        self.first_levels = {}  # world id (None for campaign mode) -> first level id
+
+    @classmethod
+    def build(cls, version):
+        graph = cls(version)
+        levels = Level.objects.order_by(
+            F('section__world__index').asc(nulls_last=True),
+            'section__world_id',
+            F('section__index').asc(nulls_last=True),
+            'section_id',
+            F('index').asc(nulls_last=True),
+            'id',
+        ).values_list('id', 'section__world_id', 'section__world__is_custom_world')
+
+        last_levels = {}  # chain -> last level id seen
+        for level_id, world_id, is_custom_world in levels:
+            chain = world_id if is_custom_world else None
+            previous = last_levels.get(chain)
+            if previous is None:
+                graph.first_levels[chain] = level_id
+            else:
+                graph.next_levels[previous] = level_id
+            graph.next_levels[level_id] = None
+            last_levels[chain] = level_id
+
+        return graph
+
+    def get_first_level_id(self, world=None):
+        """
+        :param world: the world object, None for campaign mode
+        :return: id of the first level of the world, or None if the world has no level
+        """
+        if not world or not world.is_custom_world:
+            return self.first_levels.get(None)
+        return self.first_levels.get(world.id)
+
+    def get_next_level_id(self, level_id):
+        """
+        :param level_id: id of the completed level
+        :return: id of the level to unlock, or None if the world is completed
+        """
+        return self.next_levels.get(level_id)
+
+
+def get_progression_graph():
+    """
+    Returns the progression graph of this process, rebuilding it if the levels changed since it was built.
+    """
+    global _graph
+    version = get_cache_version(GRAPH_CACHE_NAME)
+    if _graph is None or _graph.version != version:
+        _graph = ProgressionGraph.build(version)
+    return _graph
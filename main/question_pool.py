@@ -0,0 +1,107 @@
+from array import array
+from bisect import bisect_left
+
+from django.core.cache import cache
+
+from main.cache_versions import get_cache_version, bump_cache_version, get_cache_version_timeout
+from main.models import Question, QuestionRecord
+
+POOL_CACHE_NAME = "question_pool"
+ANSWERED_CACHE_TIMEOUT = 60 * 60  # Rebuilt from the records at least every hour
+ANSWERED_CACHE_NAME = "answered_questions"
+
+_pool = None
+
+
+class QuestionPool:
+    """
+    Index of Question ids by Section and difficulty, held as sorted integer arrays.
+    Sections are loaded on first use, and the whole pool is dropped whenever a Question changes.
+    """
+
+    def __init__(self, version):
+        self.version = version
+        self.sections = {}  # section id -> {difficulty -> array of question ids}
+
+    def __load_section(self, section_id):
+        questions = {}
+        rows = Question.objects.filter(section_id=section_id).order_by('id').values_list('id', 'difficulty')
+        for question_id, difficulty in rows:
+            questions.setdefault(difficulty, array('l')).append(question_id)
+        self.sections[section_id] = questions
+        return questions
+
+    def get_question_ids(self, section_id, difficulties):
+        """
+        :param section_id: id of the section
+        :param difficulties: iterable of difficulties ("1", "2", "3") to include
+        :return: sorted array of question ids
+        """
+        questions = self.sections.get(section_id)
+        if questions is None:
+            questions = self.__load_section(section_id)
+
+        if len(difficulties) == 1:
+            return questions.get(difficulties[0], array('l'))
+
+        ids = array('l')
+        for difficulty in difficulties:
+            ids.extend(questions.get(difficulty, ()))
+        return array('l', sorted(ids))
+
+
+def get_question_pool():
+    """
+    Returns the question pool of this process, dropping it if a question changed since it was loaded.
+    """
+    global _pool
+    version = get_cache_version(POOL_CACHE_NAME)
+    if _pool is None or _pool.version != version:
+        _pool = QuestionPool(version)
+    return _pool
+
+
+def _answered_name(user_id, world_id):
+    return "%s:%s:%s" % (ANSWERED_CACHE_NAME, user_id, world_id)
+
+
+def get_answered_question_ids(user_id, world_id):
+    """
+    Returns the ids of the questions a user has answered correctly in a world. Cached against a version stamp of the
+    user and world, so with a cache local to each process, the set of another process is stale for at most
+    CACHE_VERSION_TIMEOUT.
+    :return: sorted array of question ids
+    """
+    name = _answered_name(user_id, world_id)
+    key = "%s:%s" % (name, get_cache_version(name))
+    ids = cache.get(key)
+    if ids is None:
+        ids = array('l', QuestionRecord.objects.filter(
+            user_id=user_id,
+            level__section__world_id=world_id,
+            is_correct=True,
+        ).order_by('question_id').values_list('question_id', flat=True).distinct())
+        cache.set(key, ids, min(get_cache_version_timeout() or ANSWERED_CACHE_TIMEOUT, ANSWERED_CACHE_TIMEOUT))
+    return ids
+
+
+def invalidate_answered_question_ids(user_id, world_id):
+    """
+    Drops the cached answered set of a user in a world, once new correct answers are committed. The set is reloaded
+    from the records on next use, so that concurrent gradings never lose an answer.
+    """
+    bump_cache_version(_answered_name(user_id, world_id))
+
+
+def exclude_question_ids(ids, excluded):
+    """
+    :param ids: question ids to filter
+    :param excluded: sorted array of question ids to leave out
+    :return: list of the ids not in excluded
+    """
+    res = []
+    for question_id in ids:
+        index = bisect_left(excluded, question_id)
+        if index == len(excluded) or excluded[index] != question_id:
+            res.append(question_id)
+    return res
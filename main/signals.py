@@ -0,0 +1,49 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from main.cache_versions import bump_cache_version
+from main.leaderboard import CLASSES_CACHE_NAME
+from main.models import World, CustomWorld, Section, Level, Question, StudentProfile, Assignment, Class
+from main.progression import GRAPH_CACHE_NAME
+from main.question_pool import POOL_CACHE_NAME
+from main.world_tree import WORLD_TREE_CACHE_NAME
+
+
+@receiver([post_save, post_delete], sender=World)
+@receiver([post_save, post_delete], sender=CustomWorld)
+@receiver([post_save, post_delete], sender=Section)
+@receiver([post_save, post_delete], sender=Level)
+def invalidate_progression_graph(sender, **kwargs):
+    """
+    Levels are unlocked following the World, Section and Level order, rebuild the graph whenever one of them changes.
+    """
+    bump_cache_version(GRAPH_CACHE_NAME)
+
+
+@receiver([post_save, post_delete], sender=World)
+@receiver([post_save, post_delete], sender=CustomWorld)
+@receiver([post_save, post_delete], sender=Section)
+@receiver([post_save, post_delete], sender=Level)
+def invalidate_world_tree(sender, **kwargs):
+    """
+    Worlds are served with their Sections and Levels pre-rendered, render them again whenever one of them changes.
+    """
+    bump_cache_version(WORLD_TREE_CACHE_NAME)
+
+
+@receiver([post_save, post_delete], sender=Question)
+def invalidate_question_pool(sender, **kwargs):
+    """
+    Questions are picked from the question pool, drop it whenever a Question is added, moved or deleted.
+    """
+    bump_cache_version(POOL_CACHE_NAME)
+
+
+@receiver([post_save, post_delete], sender=StudentProfile)
+@receiver([post_save, post_delete], sender=Assignment)
+@receiver(post_delete, sender=Class)
+def invalidate_class_leaderboards(sender, **kwargs):
+    """
+    Class leaderboards rank the Students of the Classes, drop them whenever a Student or an Assignment moves.
+    """
+    bump_cache_version(CLASSES_CACHE_NAME)
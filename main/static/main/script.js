@@ -30,4 +30,26 @@ function changeAssignmentClass(selectObject) {
     } else {
         window.location.replace("/admin/assignment_statistics?access_code=" + access_code + "&class=" + class_name);
     }
-}
\ No newline at end of file
+}
+function pollJob(jobId) {
+    // Reloads the page once the statistics computed in the background are ready
+    fetch("/admin/jobs/" + jobId + "/")
+        .then(response => response.json())
+        .then(job => {
+            const progress = document.getElementById("job-progress");
+            if (job.status === "Done") {
+                const url = new URL(window.location.href);
+                url.searchParams.delete("refresh");
+                window.location.replace(url);
+            } else if (job.status === "Failed") {
+                progress.innerText = "Computing the statistics failed, please try again later.";
+            } else {
+                if (job.progress_total) {
+                    progress.innerText = job.status + " (" + job.progress_done + "/" + job.progress_total + ")";
+                } else {
+                    progress.innerText = job.status;
+                }
+                setTimeout(() => pollJob(jobId), 1000);
+            }
+        });
+}
@@ -1,10 +1,43 @@
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
 from rest_framework.test import APITestCase
 
-from main.models import Class, StudentProfile, World, Level, Section, Question, Answer
+from main.GameManager import GameManager
+from main.models import Class, StudentProfile, World, Level, Section, Question, Answer, QuestionRecord
 
 
-class FullSetUp(APITestCase):
+class GradingMixin:
+    """
+    Helpers for test cases grading answers through the GameManager
+    """
+    @staticmethod
+    def run_on_commit_callbacks():
+        """
+        Runs the callbacks waiting for the commit, as the test case transaction is never committed
+        """
+        callbacks, connection.run_on_commit = connection.run_on_commit, []
+        for _, callback in callbacks:
+            callback()
+
+    def answer_current_question(self, user, correct=True):
+        """
+        Gets the current question of a User and answers it, then runs the callbacks of the grading
+        :param user: the User answering
+        :param correct: whether to pick a correct answer
+        :return: the graded question record
+        """
+        gm = GameManager(user)
+        question_list, _ = gm.get_questions(None)
+        record = QuestionRecord.objects.get(id=question_list[0]["record_id"])
+        answer = Answer.objects.filter(question=record.question, is_correct=correct)[0]
+        gm.answer_questions([{"question_record": record, "answer": answer}])
+        self.run_on_commit_callbacks()
+        record.refresh_from_db()
+        return record
+
+
+class FullSetUp(GradingMixin, APITestCase):
     def setUp(self):
         """
         This dummy data includes:
@@ -17,6 +50,7 @@ class FullSetUp(APITestCase):
         - 1 teacher with username "teacher" and password "teacher123"
         - 1 Class "Test Class" with id 1
         """
+        cache.clear()  # Ids are reused between tests
         self.__create_classes()
         self.__create_accounts()
         self.client.force_authenticate(user=self.user)
@@ -85,6 +85,33 @@ class TestCustomWorldsAPI(APITestCase):
         self.assertEqual(response_json["access_code"], access_code)
         self.assertEqual(response_json["world_name"], "Custom World Set Up 1")
 
+    def test_custom_worlds_not_modified(self):
+        """
+        API: "api/worlds/custom/" and "api/worlds/custom/:access_code/"
+        Method: GET
+        Expected result: 304 if the client has the Custom Worlds with the same ETag, until one of them is changed
+        """
+        world_url = self.custom_world_url + "TEST00/"
+        etag = self.client.get(self.custom_world_url, format="json")["ETag"]
+        world_etag = self.client.get(world_url, format="json")["ETag"]
+
+        response = self.client.get(self.custom_world_url, format="json", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = self.client.get(world_url, format="json", HTTP_IF_NONE_MATCH=world_etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], world_etag)
+
+        self.client.put(world_url, {"topic": "Test ETag"}, format="json")
+        response = self.client.get(self.custom_world_url, format="json", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(world_url, format="json", HTTP_IF_NONE_MATCH=world_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["topic"], "Test ETag")
+
+        # Not modified with the ETag of another Custom World
+        response = self.client.get(self.custom_world_url + "TEST01/", format="json", HTTP_IF_NONE_MATCH=world_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
     def test_cannot_GET_specific_custom_world_invalid_access_code(self):
         """
         API: "api/worlds/custom/:access_code/
@@ -0,0 +1,102 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+
+from main.helper import add_graded_attempts, calculate_world_statistics, calculate_worlds_statistics
+from main.models import World, Level, Question, QuestionRecord, QuestionStatistics, SectionStatistics
+from main.tests.full_setup import FullSetUp
+
+
+class TestWorldStatistics(FullSetUp):
+    def setUp(self):
+        """
+        The user of the Test Class answers 2 questions of Section 1 and 1 of Section 2, a Student of no Class answers one
+        question of Section 1, and an inactive Student one that is not counted.
+        """
+        super().setUp()
+        self.world = World.objects.get(id=1)
+        self.other = User.objects.create_user(username="other", password="other123")
+        inactive = User.objects.create_user(username="inactive", password="inactive123", is_active=False)
+
+        self.question1, self.question2 = Question.objects.filter(section_id=1)[:2]
+        question3 = Question.objects.filter(section_id=2).first()
+        level1 = Level.objects.get(id=1)
+        level4 = Level.objects.get(id=4)
+        for user, question, level, is_correct, points in [
+            (self.user, self.question1, level1, True, 10),
+            (self.user, self.question2, level1, False, -5),
+            (self.user, question3, level4, True, 20),
+            (self.other, self.question1, level1, False, -2),
+            (inactive, self.question1, level1, True, 100),
+        ]:
+            QuestionRecord.objects.create(user=user, question=question, level=level, is_correct=is_correct,
+                                          points_change=points, is_completed=True)
+        # Records above are created directly, bypassing the GameManager
+        call_command("rebuild_statistics", stdout=StringIO())
+
+    def test_world_statistics(self):
+        """
+        Test the section totals and question counts of a World, in a constant number of queries.
+        """
+        with self.assertNumQueries(4):  # section rollups, question rollups, questions, sections
+            stats = calculate_world_statistics(self.world)
+
+        self.assertEqual(stats["world_name"], "Dusza")
+        self.assertEqual([section["sub_topic_name"] for section in stats["sections"]],
+                         ["Requirements Elicitation", "Conceptual Models", "Dynamic Models"])
+
+        section1, section2, section3 = stats["sections"]
+        self.assertEqual((section1["total_points"], section1["avg_points"]), (3, 1))
+        self.assertEqual((section2["total_points"], section2["avg_points"]), (20, 20))
+        self.assertEqual((section3["total_points"], section3["avg_points"]), (0, 0))
+
+        self.assertEqual(len(section1["questions"]), Question.objects.filter(section_id=1).count())
+        self.assertEqual(section1["questions"][0],
+                         {"question": self.question1.question, "num_correct": 1, "num_incorrect": 1})
+        self.assertEqual(section1["questions"][1],
+                         {"question": self.question2.question, "num_correct": 0, "num_incorrect": 1})
+        self.assertEqual(section1["questions"][2]["num_correct"] + section1["questions"][2]["num_incorrect"], 0)
+
+    def test_world_statistics_by_class(self):
+        """
+        Test only the records of the Students of the given Class are counted.
+        """
+        stats = calculate_world_statistics(self.world, "Test Class")
+        section1 = stats["sections"][0]
+        self.assertEqual((section1["total_points"], section1["avg_points"]), (5, 2.5))
+        self.assertEqual(section1["questions"][0],
+                         {"question": self.question1.question, "num_correct": 1, "num_incorrect": 0})
+
+    def test_statistics_follow_answers(self):
+        """
+        Test the statistics rollups are updated as answers are graded and match the question records.
+        """
+        record = self.answer_current_question(self.user)
+
+        section1 = calculate_world_statistics(self.world, "Test Class")["sections"][0]
+        self.assertEqual(section1["total_points"], 5 + record.points_change)
+        call_command("rebuild_statistics", "--check", stdout=StringIO())
+
+    def test_add_graded_attempts(self):
+        """
+        Test the attempts of a submission are summed up per question before being added to the statistics rollups of
+        the Test Class, on top of those of the set up.
+        """
+        add_graded_attempts(self.test_class.id, 1, [
+            (self.question2.id, True, 10), (self.question1.id, False, -5), (self.question2.id, False, -5),
+        ])
+        statistics = QuestionStatistics.objects.get(question=self.question2, class_group=self.test_class)
+        self.assertEqual((statistics.attempts, statistics.num_correct, statistics.num_incorrect,
+                          statistics.total_points), (1 + 2, 0 + 1, 1 + 1, -5 + 5))
+        statistics = SectionStatistics.objects.get(section_id=1, class_group=self.test_class)
+        self.assertEqual((statistics.attempts, statistics.num_correct, statistics.total_points), (2 + 3, 1 + 1, 5 + 0))
+
+    def test_worlds_statistics(self):
+        """
+        Test the statistics of several Worlds are the same as World by World, in the same number of queries.
+        """
+        worlds = list(World.objects.order_by("-id"))
+        with self.assertNumQueries(4):
+            stats = calculate_worlds_statistics(worlds)
+        self.assertEqual(stats, [calculate_world_statistics(world) for world in worlds])
@@ -0,0 +1,75 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+
+from main.item_analysis import analyse_items
+from main.models import Question, QuestionRecord, Level, QuestionAnalysis
+from main.tests.full_setup import FullSetUp
+
+
+class TestItemAnalysis(FullSetUp):
+    def setUp(self):
+        """
+        4 Students answer 2 Questions: Student 1 gets both right, Student 4 both wrong, Students 2 and 3 only the
+        first one right. An inactive Student getting the second one right is not counted.
+        """
+        super().setUp()
+        self.question1, self.question2 = Question.objects.filter(section_id=1)[:2]
+        students = [User.objects.create_user(username="student%s" % i, password="student123") for i in range(1, 5)]
+        inactive = User.objects.create_user(username="inactive", password="inactive123", is_active=False)
+
+        self.attempts = [
+            (students[0], self.question1, True), (students[0], self.question2, True),
+            (students[1], self.question1, True), (students[1], self.question2, False),
+            (students[2], self.question1, True), (students[2], self.question2, False),
+            (students[3], self.question1, False), (students[3], self.question2, False),
+        ]
+        level = Level.objects.get(id=1)
+        for user, question, is_correct in self.attempts + [(inactive, self.question2, True)]:
+            QuestionRecord.objects.create(user=user, question=question, level=level, is_correct=is_correct,
+                                          is_completed=True)
+
+    def test_analyse_items(self):
+        """
+        Test the p-values, discrimination indices and suggested difficulties computed from the attempts.
+        """
+        user_ids, question_ids, is_correct = zip(*[(user.id, question.id, correct)
+                                                   for user, question, correct in self.attempts])
+        analysis = analyse_items(user_ids, question_ids, is_correct, min_attempts=4)
+        self.assertEqual(list(analysis["question_id"]), [self.question1.id, self.question2.id])
+        self.assertEqual(list(analysis["attempts"]), [4, 4])
+        self.assertEqual(list(analysis["p_value"]), [0.75, 0.25])
+        # Groups of 2 Students: Student 1 or 4 with one of Students 2 and 3
+        self.assertEqual(list(analysis["discrimination"]), [0.5, 0.5])
+        self.assertEqual(list(analysis["suggested_difficulty"]), ["1", "3"])
+
+        analysis = analyse_items(user_ids, question_ids, is_correct, min_attempts=5)
+        self.assertEqual(list(analysis["suggested_difficulty"]), ["", ""])
+
+    def test_groups_with_ties(self):
+        """
+        Test the upper and lower groups are 27% of the Students each, even when most Students have the same ability.
+        8 of 10 Students answer both Questions right, the 2 others only the first one.
+        """
+        user_ids, question_ids, is_correct = [], [], []
+        for user_id in range(10):
+            for question_id in [1, 2]:
+                user_ids.append(user_id)
+                question_ids.append(question_id)
+                is_correct.append(user_id < 8 or question_id == 1)
+        analysis = analyse_items(user_ids, question_ids, is_correct)
+        # Lower group: Students 8, 9 and one Student answering both right. Upper group: 3 Students answering both right
+        self.assertEqual(list(analysis["discrimination"]), [0, 1 - 1 / 3])
+
+    def test_analyse_questions_command(self):
+        """
+        Test the command saves the analysis of every attempted Question, from the attempts of active Students.
+        """
+        call_command("analyse_questions", "--min-attempts", "4", stdout=StringIO())
+        self.assertEqual(QuestionAnalysis.objects.count(), 2)
+
+        analysis = QuestionAnalysis.objects.get(question=self.question2)
+        self.assertEqual((analysis.attempts, analysis.p_value), (4, 0.25))
+        self.assertEqual(analysis.discrimination, 0.5)
+        self.assertEqual(analysis.suggested_difficulty, "3")
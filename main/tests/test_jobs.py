@@ -0,0 +1,114 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import Client
+from django.utils.timezone import now
+
+from main.helper import calculate_world_statistics
+from main.jobs import enqueue_job, register_job, get_job_result, claim_next_job, RUNNING_TIMEOUT
+from main.models import Job, World
+from main.tests.full_setup import FullSetUp
+
+
+@register_job("failing_test_job")
+def failing_test_job(params, report_progress):
+    raise RuntimeError("Job failed")
+
+
+class TestJobs(FullSetUp):
+    def test_job_runs_in_worker(self):
+        """
+        Test a queued job is run by the worker and its result is kept, and the same job is only queued once.
+        """
+        params = {"world_ids": [1, 2], "class_name": None}
+        job = enqueue_job("world_statistics", params)
+        self.assertEqual(enqueue_job("world_statistics", params), job)
+        self.assertIsNone(get_job_result("world_statistics", params))
+
+        call_command("run_jobs", "--once", stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual((job.progress_done, job.progress_total), (1, 1))
+        self.assertEqual(job.result, [calculate_world_statistics(World.objects.get(id=1)),
+                                      calculate_world_statistics(World.objects.get(id=2))])
+        self.assertEqual(get_job_result("world_statistics", params), job)
+
+        # Queued again once finished
+        self.assertNotEqual(enqueue_job("world_statistics", params), job)
+
+    def test_failed_job(self):
+        """
+        Test a failing job is marked failed with its error, without stopping the worker.
+        """
+        failing = enqueue_job("failing_test_job", {})
+        job = enqueue_job("world_statistics", {"world_ids": [2], "class_name": None})
+
+        call_command("run_jobs", "--once", stdout=StringIO())
+        failing.refresh_from_db()
+        job.refresh_from_db()
+        self.assertEqual(failing.status, Job.FAILED)
+        self.assertIn("Job failed", failing.error)
+        self.assertEqual(job.status, Job.DONE)
+
+    def test_stale_running_job(self):
+        """
+        Test a job left running by a stopped worker is marked failed once it times out, and the same job is queued again.
+        """
+        params = {"world_ids": [1], "class_name": None}
+        job = enqueue_job("world_statistics", params)
+        self.assertEqual(claim_next_job(), job)
+        self.assertEqual(enqueue_job("world_statistics", params), job)
+
+        Job.objects.filter(id=job.id).update(date_started=now() - RUNNING_TIMEOUT - timedelta(minutes=1))
+        new_job = enqueue_job("world_statistics", params)
+        self.assertNotEqual(new_job, job)
+        self.assertEqual(new_job.status, Job.QUEUED)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+
+    def test_admin_statistics_page(self):
+        """
+        Test the admin statistics page queues the statistics, reports the progress, and shows the result once done.
+        """
+        User.objects.create_superuser(username="admin", email="admin@email.com", password="admin123")
+        client = Client()
+        client.login(username="admin", password="admin123")
+
+        response = client.get("/admin/campaign_statistics/")
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Computing the statistics")
+        job = Job.objects.get(kind="world_statistics")
+
+        response = client.get("/admin/jobs/%s/" % job.id)
+        self.assertEqual(response.json()["status"], "Queued")
+
+        call_command("run_jobs", "--once", stdout=StringIO())
+        response = client.get("/admin/jobs/%s/" % job.id)
+        self.assertEqual(response.json()["status"], "Done")
+
+        response = client.get("/admin/campaign_statistics/")
+        self.assertNotContains(response, "Computing the statistics")
+        self.assertContains(response, "Requirements Elicitation")
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_admin_statistics_page_all_worlds(self):
+        """
+        Test the admin statistics page shows the statistics of all the worlds, computed in a single job.
+        """
+        User.objects.create_superuser(username="admin", email="admin@email.com", password="admin123")
+        client = Client()
+        client.login(username="admin", password="admin123")
+
+        client.get("/admin/campaign_statistics/", {"world": "All"})
+        job = Job.objects.get(kind="world_statistics")
+        self.assertEqual(job.params["world_ids"], [1, 2, 3])
+        call_command("run_jobs", "--once", stdout=StringIO())
+
+        response = client.get("/admin/campaign_statistics/", {"world": "All"})
+        for world in World.objects.all():
+            self.assertContains(response, "<h2 class=\"text-primary\">%s</h2>" % world.world_name, html=True)
+
+        response = client.get("/admin/campaign_statistics/", {"world": "Nowhere"})
+        self.assertEqual(response.status_code, 404)
@@ -1,9 +1,16 @@
+from django.core.management import call_command
+from django.utils import timezone
 from rest_framework.test import APITestCase
 from rest_framework import status
-from main.models import User, World, Section, Level, Question, Answer, QuestionRecord
+from main.leaderboard import get_cached_leaderboard, invalidate_leaderboard
+from main.tests.full_setup import GradingMixin
+from main.models import User, World, Section, Level, Question, Answer, QuestionRecord, Class, StudentProfile, \
+    CustomWorld, Assignment
+import json
 import random
+from io import StringIO
 
-class TestLeaderboardAPI(APITestCase):
+class TestLeaderboardAPI(GradingMixin, APITestCase):
     def setUp(self):
         """
         Creates a Student User and 3 Campaign Worlds
@@ -12,6 +19,8 @@ class TestLeaderboardAPI(APITestCase):
         self.__simulate_student1()
         self.__simulate_student2()
         self.__simulate_student3()
+        # Records above are created directly, bypassing the GameManager
+        call_command("rebuild_score_ledger", stdout=StringIO())
         self.client.force_authenticate(user=self.student1)
 
         self.leaderboard_url = "/api/leaderboard/"
@@ -216,6 +225,17 @@ class TestLeaderboardAPI(APITestCase):
         self.assertEqual(response_json[0]["points"], 160)
         self.assertEqual(response_json[1]["points"], 60)
 
+    def test_cannot_GET_with_invalid_page(self):
+        """
+        API: "api/leaderboard?offset=a b"
+        Method: GET with invalid offset, limit or cursor
+        Expected result: 400, the parameters being validated before the page is looked up in the cache
+        """
+        for params in [{"offset": "a b"}, {"offset": "0"}, {"limit": "-1"},
+                       {"cursor": "1:2"}, {"cursor": "", "limit": "0"}]:
+            response = self.client.get(self.leaderboard_url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
     def test_can_GET_with_world_1(self):
         """
         API: "api/leaderboard?world_id=1"
@@ -276,4 +296,241 @@ class TestLeaderboardAPI(APITestCase):
         self.assertEqual(response_json["first_name"], "Student Three")
         self.assertEqual(response_json["rank"], 3)
         # check points
-        self.assertEqual(response_json["points"], 60)
\ No newline at end of file
+        self.assertEqual(response_json["points"], 60)
+
+    def test_leaderboard_follows_answers(self):
+        """
+        API: "api/leaderboard?world_id=1"
+        Method: GET
+        Expected result: points graded by the GameManager show up on the world and overall leaderboards
+        """
+        record = self.answer_current_question(self.student3)
+
+        response = self.client.get(self.leaderboard_url + "?world_id=1&user_id=4", format="json")
+        self.assertEqual(response.json()["points"], 60 + record.points_change)
+        response = self.client.get(self.leaderboard_url + "?user_id=4", format="json")
+        self.assertEqual(response.json()["points"], 60 + record.points_change)
+
+    def test_can_GET_with_user_tied(self):
+        """
+        API: "api/leaderboard?world_id=1&user_id=3"
+        Method: GET
+        Expected result: Student Two is tied with Student One in World 1 and ranked after them, like in the full
+        leaderboard, using a constant number of queries
+        """
+        with self.assertNumQueries(4):  # world, user, entry, students ahead
+            response = self.client.get(self.leaderboard_url + "?world_id=1&user_id=3", format="json")
+        response_json = response.json()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response_json["first_name"], "Student Two")
+        self.assertEqual(response_json["rank"], 2)
+        self.assertEqual(response_json["points"], 90)
+
+    def test_can_GET_with_cursor(self):
+        """
+        API: "api/leaderboard?cursor=&limit=2"
+        Method: GET with an empty cursor, then with the cursor of the first page
+        Expected result: Pages of the leaderboard with the same rankings as without cursor:
+        - first page: Student Two (1), Student One (2), with a cursor to the next page
+        - second page: Student Three (3), without a cursor as it is the last page
+        """
+        response = self.client.get(self.leaderboard_url + "?cursor=&limit=2", format="json")
+        response_json = response.json()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([student["first_name"] for student in response_json], ["Student Two", "Student One"])
+        self.assertEqual([student["rank"] for student in response_json], [1, 2])
+
+        response = self.client.get(self.leaderboard_url, {"cursor": response["X-Next-Cursor"], "limit": 2})
+        response_json = response.json()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response_json), 1)
+        self.assertEqual(response_json[0]["first_name"], "Student Three")
+        self.assertEqual(response_json[0]["rank"], 3)
+        self.assertEqual(response_json[0]["points"], 60)
+        self.assertFalse(response.has_header("X-Next-Cursor"))
+
+        response = self.client.get(self.leaderboard_url + "?cursor=abc", format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_can_GET_around_user(self):
+        """
+        API: "api/leaderboard?around_user_id=2&window=1"
+        Method: GET
+        Expected result: Student One (2) with the students right before and after them:
+        Student Two (1), Student One (2), Student Three (3)
+        """
+        response = self.client.get(self.leaderboard_url + "?around_user_id=2&window=1", format="json")
+        response_json = response.json()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([student["first_name"] for student in response_json],
+                         ["Student Two", "Student One", "Student Three"])
+        self.assertEqual([student["rank"] for student in response_json], [1, 2, 3])
+
+        # Only the student ranked before in World 1, where Student One is first
+        response = self.client.get(self.leaderboard_url + "?world_id=1&around_user_id=3&window=1", format="json")
+        response_json = response.json()
+        self.assertEqual([student["first_name"] for student in response_json],
+                         ["Student One", "Student Two", "Student Three"])
+        self.assertEqual([student["rank"] for student in response_json], [1, 2, 3])
+
+        for params in [{"around_user_id": "abc"}, {"user_id": "abc"}, {"around_user_id": 999}]:
+            response = self.client.get(self.leaderboard_url, params)
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, params)
+
+    def test_leaderboard_cached_until_answers(self):
+        """
+        API: "api/leaderboard?world_id=1"
+        Method: GET
+        Expected result: the leaderboard is served from the cache, until the GameManager grades an answer in the world
+        """
+        self.client.get(self.leaderboard_url + "?world_id=1", format="json")
+        with self.assertNumQueries(1):  # world
+            response = self.client.get(self.leaderboard_url + "?world_id=1", format="json")
+        self.assertEqual(response.json()[2]["points"], 60)
+
+        record = self.answer_current_question(self.student3)
+
+        response = self.client.get(self.leaderboard_url + "?world_id=1", format="json")
+        student3 = next(student for student in response.json() if student["first_name"] == "Student Three")
+        self.assertEqual(student3["points"], 60 + record.points_change)
+
+    def test_leaderboard_rebuilt_once(self):
+        """
+        Expected result: while a changed leaderboard is rebuilt, other requests for the page are served the last page
+        built rather than rebuilding it too
+        """
+        self.assertEqual(get_cached_leaderboard("page", lambda: "first"), "first")
+        invalidate_leaderboard()
+
+        def build():
+            # Concurrent request, while this one rebuilds the page
+            self.assertEqual(get_cached_leaderboard("page", lambda: self.fail("Rebuilt twice")), "first")
+            return "second"
+        self.assertEqual(get_cached_leaderboard("page", build), "second")
+        self.assertEqual(get_cached_leaderboard("page", lambda: self.fail("Not cached")), "second")
+
+    def __create_class(self):
+        """
+        Puts Student One and Student Three in a Class, Student Two is not in it
+        """
+        self.class_group = Class.objects.create(teacher=self.superuser, class_name="Class A")
+        StudentProfile.objects.create(student=self.student1, year_of_study=1, class_group=self.class_group)
+        StudentProfile.objects.create(student=self.student3, year_of_study=1, class_group=self.class_group)
+
+    def test_can_GET_with_class_id(self):
+        """
+        API: "api/leaderboard?class_id=<id>"
+        Method: GET
+        Expected result: Only the Students of the Class, ranked among themselves:
+        Student One (1), Student Three (2)
+        """
+        self.__create_class()
+        response = self.client.get(self.leaderboard_url, {"class_id": self.class_group.id})
+        response_json = response.json()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([student["first_name"] for student in response_json], ["Student One", "Student Three"])
+        self.assertEqual([student["rank"] for student in response_json], [1, 2])
+
+        response = self.client.get(self.leaderboard_url, {"class_id": self.class_group.id, "user_id": self.student3.id})
+        self.assertEqual(response.json()["rank"], 2)
+
+        # Cached class leaderboards follow Students moving out of the Class
+        self.student1.student_profile.delete()
+        response = self.client.get(self.leaderboard_url, {"class_id": self.class_group.id})
+        self.assertEqual([student["first_name"] for student in response.json()], ["Student Three"])
+
+        response = self.client.get(self.leaderboard_url, {"class_id": 999})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_can_GET_with_access_code(self):
+        """
+        API: "api/leaderboard?access_code=<code>"
+        Method: GET
+        Expected result: Leaderboard of the Custom World, ranking only the Students of the Class it is assigned to:
+        Student Three (1), Student One (2), or all the Students once it is not assigned anymore
+        """
+        self.__create_class()
+        custom_world = CustomWorld.objects.create(world_name="Custom", topic="Custom", created_by=self.superuser,
+                                                  is_custom_world=True)
+        Assignment.objects.create(custom_world=custom_world, class_group=self.class_group, name="Assignment",
+                                  deadline=timezone.now())
+        section = Section.objects.create(world=custom_world, sub_topic_name="Custom")
+        level = Level.objects.create(section=section, level_name="Custom Level")
+        question = Question.objects.create(section=section, question="Custom Question", difficulty="1",
+                                           created_by=self.superuser)
+        for student, points in [(self.student1, 20), (self.student2, 50), (self.student3, 30)]:
+            QuestionRecord.objects.create(question=question, level=level, is_correct=True, points_change=points,
+                                          user=student)
+        call_command("rebuild_score_ledger", stdout=StringIO())
+
+        response = self.client.get(self.leaderboard_url, {"access_code": custom_world.access_code})
+        response_json = response.json()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([student["first_name"] for student in response_json], ["Student Three", "Student One"])
+        self.assertEqual([student["points"] for student in response_json], [30, 20])
+
+        # Without an assignment, everyone who played the Custom World is ranked
+        Assignment.objects.filter(custom_world=custom_world).delete()
+        response = self.client.get(self.leaderboard_url, {"access_code": custom_world.access_code})
+        self.assertEqual([student["points"] for student in response.json()], [50, 30, 20])
+        response = self.client.get(self.leaderboard_url, {"access_code": custom_world.access_code,
+                                                          "class_id": self.class_group.id})
+        self.assertEqual([student["points"] for student in response.json()], [30, 20])
+
+        response = self.client.get(self.leaderboard_url, {"access_code": "NOCODE"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_can_GET_with_period(self):
+        """
+        API: "api/leaderboard?period=day"
+        Method: GET
+        Expected result: Only the points earned today, graded by the GameManager, are ranked
+        """
+        record = self.answer_current_question(self.student3)
+
+        for period in ["day", "week"]:
+            response = self.client.get(self.leaderboard_url, {"period": period})
+            response_json = response.json()
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response_json), 1)
+            self.assertEqual(response_json[0]["first_name"], "Student Three")
+            self.assertEqual(response_json[0]["points"], record.points_change)
+            self.assertEqual(response_json[0]["rank"], 1)
+
+        response = self.client.get(self.leaderboard_url, {"period": "day", "world_id": 2})
+        self.assertEqual(response.json(), [])
+        response = self.client.get(self.leaderboard_url, {"period": "day", "user_id": self.student3.id})
+        self.assertEqual(response.json()["rank"], 1)
+        response = self.client.get(self.leaderboard_url, {"period": "year"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_can_export(self):
+        """
+        API: "api/leaderboard/export/"
+        Method: GET as a teacher, as CSV then as NDJSON
+        Expected result: The whole leaderboard, streamed one student per line:
+        Student Two (1), Student One (2), Student Three (3)
+        """
+        response = self.client.get(self.leaderboard_url + "export/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(user=self.superuser)
+        response = self.client.get(self.leaderboard_url + "export/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines, [
+            "rank,user_id,first_name,last_name,points",
+            "1,%s,Student Two,Student Two,250" % self.student2.id,
+            "2,%s,Student One,Student One,160" % self.student1.id,
+            "3,%s,Student Three,Student Three,60" % self.student3.id,
+        ])
+
+        response = self.client.get(self.leaderboard_url + "export/", {"output": "ndjson", "world_id": 1})
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row["first_name"] for row in rows], ["Student One", "Student Two", "Student Three"])
+        self.assertEqual([row["rank"] for row in rows], [1, 2, 3])
+
+        response = self.client.get(self.leaderboard_url + "export/", {"output": "xml"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
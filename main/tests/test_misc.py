@@ -125,3 +125,69 @@ class TestMisc(FullSetUp):
         }
 
         self.assertEqual(res.data, data)
+
+    def test_get_position_single_query(self):
+        """
+        Test the position is read from the progress cursor with a single query, regardless of history.
+        """
+        gm = GameManager(self.user)
+        level = gm.get_user_position_in_world()  # Init the first level
+        for i in range(0, 5):
+            level = gm.complete_level(level)
+
+        gm = GameManager(self.user)
+        with self.assertNumQueries(1):
+            position, has_completed_world = gm.get_user_position_in_world(check_completed=True)
+            world_id = position.section.world.id
+
+        self.assertEqual(position, level)
+        self.assertEqual(world_id, level.section.world_id)
+        self.assertFalse(has_completed_world)
+
+    def test_get_position_after_completing_campaign(self):
+        """
+        API: /api/position/
+        Test the position stays on the last level and is marked completed after the last level is completed.
+        """
+        level = Level.objects.get(id=self.total_levels)
+        UserLevelProgressRecord.objects.create(
+            user=self.user,
+            level=level
+        )
+
+        gm = GameManager(self.user)
+        self.assertIsNone(gm.complete_level(level))
+
+        res = self.client.get("/api/position/")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["level_id"], level.id)
+        self.assertTrue(res.data["has_completed"])
+
+    def test_get_state(self):
+        """
+        API: /api/state/
+        Test get position, score, difficulty and session stats at once, with and without the pending question.
+        """
+        res = self.client.get("/api/state/")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        data = {
+            'world_id': 1,
+            'section_id': 1,
+            'level_id': 1,
+            'has_completed': False,
+            'points': 0,
+            'difficulty_id': '1',
+            'difficulty_text': 'Easy',
+            'score': 0,
+            'correct_counter': 0,
+        }
+        self.assertEqual(res.data, data)
+
+        # No question is generated by the state endpoint
+        res = self.client.get("/api/state/?include_questions=true")
+        self.assertEqual(res.data["questions"], [])
+
+        question = self.client.get("/api/questions/world/").data["questions"][0]
+        res = self.client.get("/api/state/?include_questions=true")
+        self.assertEqual(res.data["questions"], [question])
+        self.assertEqual(res.data["points"], self.client.get("/api/score/").data["points"])
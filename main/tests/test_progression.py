@@ -0,0 +1,74 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import override_settings
+
+from main.cache_versions import get_cache_version_timeout
+from main.GameManager import GameManager
+from main.models import World, Section, Level, CustomWorld
+from main.progression import get_progression_graph, GRAPH_CACHE_NAME
+from main.tests.full_setup import FullSetUp
+
+
+class TestProgression(FullSetUp):
+    def test_campaign_chain(self):
+        """
+        Test every campaign level unlocks the next one, across sections and worlds, and the last one unlocks nothing.
+        """
+        graph = get_progression_graph()
+        self.assertEqual(graph.get_first_level_id(), 1)
+        for level_id in range(1, self.total_levels):
+            self.assertEqual(graph.get_next_level_id(level_id), level_id + 1)
+        self.assertIsNone(graph.get_next_level_id(self.total_levels))
+
+    def test_follows_index_order(self):
+        """
+        Test levels are unlocked in index order rather than id order, and that the graph picks up new levels.
+        """
+        world = World.objects.create(world_name="Early", topic="Inserted before the first world", index=0)
+        section = Section.objects.create(world=world, sub_topic_name="Introduction", index=0)
+        second = Level.objects.create(section=section, level_name="Level Two", index=-1)
+        first = Level.objects.create(section=section, level_name="Level One", index=-2)
+
+        graph = get_progression_graph()
+        self.assertEqual(graph.get_first_level_id(), first.id)
+        self.assertEqual(graph.get_next_level_id(first.id), second.id)
+        self.assertEqual(graph.get_next_level_id(second.id), 1)
+
+        gm = GameManager(self.user)
+        self.assertEqual(gm.get_user_position_in_world(), first)
+        self.assertEqual(gm.complete_level(first), second)
+
+    def test_custom_world_chain(self):
+        """
+        Test a custom world has a chain of its own which ends at its last level.
+        """
+        custom_world = CustomWorld.objects.create(world_name="Custom", topic="Custom", is_custom_world=True,
+                                                  created_by=self.teacher)
+        section = Section.objects.create(world=custom_world, sub_topic_name="Custom")
+        levels = [Level.objects.create(section=section, level_name="Custom Level %s" % i) for i in range(4)]
+
+        graph = get_progression_graph()
+        self.assertEqual(graph.get_first_level_id(custom_world), levels[0].id)
+        self.assertEqual(graph.get_next_level_id(levels[2].id), levels[3].id)
+        self.assertIsNone(graph.get_next_level_id(levels[3].id))
+        self.assertEqual(graph.get_first_level_id(), 1)
+
+    def test_changes_from_other_processes(self):
+        """
+        Test the graph picks up the levels changed by another process, whose invalidation does not reach the cache of
+        this one, once the version stamp expires.
+        """
+        get_progression_graph()
+        Level.objects.filter(id=1).update(index=100)  # No signal, as in another process
+        cache.delete("version:%s" % GRAPH_CACHE_NAME)  # The version stamp expires
+        self.assertEqual(get_progression_graph().get_first_level_id(), 2)
+
+    @override_settings(CACHE_VERSION_TIMEOUT=30)
+    def test_version_timeout(self):
+        """
+        Test version stamps expire with a cache local to each process only, and never with a shared cache.
+        """
+        self.assertEqual(get_cache_version_timeout(), 30)
+        with patch("main.cache_versions.caches", {"default": object()}):
+            self.assertIsNone(get_cache_version_timeout())
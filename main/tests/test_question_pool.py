@@ -0,0 +1,62 @@
+from main.GameManager import GameManager
+from main.models import Question, Section, Level, QuestionRecord
+from main.question_pool import get_question_pool, get_answered_question_ids, invalidate_answered_question_ids, \
+    exclude_question_ids
+from main.tests.full_setup import FullSetUp
+
+
+class TestQuestionPool(FullSetUp):
+    def test_pool_by_difficulty(self):
+        """
+        Test the pool holds the question ids of a section by difficulty, in id order.
+        """
+        pool = get_question_pool()
+        for difficulty in ["1", "2", "3"]:
+            expected = list(Question.objects.filter(section_id=1, difficulty=difficulty)
+                            .order_by('id').values_list('id', flat=True))
+            self.assertEqual(list(pool.get_question_ids(1, [difficulty])), expected)
+
+        expected = list(Question.objects.filter(section_id=1).order_by('id').values_list('id', flat=True))
+        self.assertEqual(list(pool.get_question_ids(1, ["1", "2", "3"])), expected)
+
+    def test_pool_invalidated(self):
+        """
+        Test the pool picks up added and deleted questions.
+        """
+        section = Section.objects.get(id=1)
+        before = list(get_question_pool().get_question_ids(section.id, ["3"]))
+
+        question = Question.objects.create(section=section, question="New question", difficulty="3")
+        self.assertEqual(list(get_question_pool().get_question_ids(section.id, ["3"])), before + [question.id])
+
+        question.delete()
+        self.assertEqual(list(get_question_pool().get_question_ids(section.id, ["3"])), before)
+
+    def test_answered_set(self):
+        """
+        Test the answered set of a world holds the questions answered correctly in that world only.
+        """
+        record = self.answer_current_question(self.user)
+
+        self.assertEqual(list(get_answered_question_ids(self.user.id, 1)), [record.question_id])
+        self.assertEqual(list(get_answered_question_ids(self.user.id, 2)), [])
+
+        # Never served again while other questions are left
+        question_list, _ = GameManager(self.user).get_questions(None)
+        self.assertNotEqual(question_list[0]["question"].id, record.question_id)
+
+    def test_answered_set_invalidation(self):
+        """
+        Test a cached answered set is reloaded from the records once invalidated, sorted and free of duplicates.
+        """
+        self.assertEqual(list(get_answered_question_ids(self.user.id, 1)), [])
+        level = Level.objects.get(id=1)
+        for question_id in [5, 2, 9, 5]:
+            QuestionRecord.objects.create(user=self.user, level=level, question_id=question_id, is_correct=True,
+                                          is_completed=True)
+        self.assertEqual(list(get_answered_question_ids(self.user.id, 1)), [])  # Still cached
+
+        invalidate_answered_question_ids(self.user.id, 1)
+        answered = get_answered_question_ids(self.user.id, 1)
+        self.assertEqual(list(answered), [2, 5, 9])
+        self.assertEqual(exclude_question_ids([1, 2, 3, 9, 10], answered), [1, 3, 10])
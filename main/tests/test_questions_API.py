@@ -0,0 +1,124 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+
+from main.GameManager import GameManager
+from main.models import Level, UserLevelProgressRecord, QuestionRecord, Answer
+from main.tests.full_setup import FullSetUp
+
+
+class TestQuestionsAPI(FullSetUp):
+    def setUp(self):
+        """
+        Places the user at the final boss level of the first world
+        """
+        super().setUp()
+        self.questions_url = "/api/questions/world/"
+        self.final_boss_level = Level.objects.get(id=9)
+        UserLevelProgressRecord.objects.create(user=self.user, level=self.final_boss_level)
+        GameManager(self.user).get_user_position_in_world()
+
+    def test_boss_session_created(self):
+        """
+        API: /api/questions/world/
+        Test a final boss session of 10 questions with their answers is created, then served again as is.
+        """
+        res = self.client.get(self.questions_url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["questions"]), GameManager.boss_level_qn)
+        for question in res.data["questions"]:
+            self.assertEqual(len(question["answers"]), 4)
+            self.assertIsNone(question["index"])
+
+        records = QuestionRecord.objects.filter(user=self.user, level=self.final_boss_level)
+        self.assertEqual(sorted(q["record_id"] for q in res.data["questions"]),
+                         sorted(records.values_list("id", flat=True)))
+
+        res_again = self.client.get(self.questions_url)
+        self.assertEqual(res_again.data["questions"], res.data["questions"])
+        self.assertEqual(records.count(), GameManager.boss_level_qn)
+
+    def test_boss_session_query_count(self):
+        """
+        API: /api/questions/world/
+        Test the number of queries to create and to serve a final boss session does not depend on its size.
+        """
+        # position, open records, progress, sections, answered set, 3x question pool, insert, open records,
+        # answers, level stats
+        with self.assertNumQueries(12):
+            self.client.get(self.questions_url)
+
+        # position, open records, answers, progress, level stats
+        with self.assertNumQueries(5):
+            self.client.get(self.questions_url)
+
+    def test_boss_answers_graded_once(self):
+        """
+        API: /api/questions/world/check/
+        Test a final boss submission is graded in one go, and a repeated submission of the same records is rejected
+        without unlocking the next level twice.
+        """
+        res = self.client.get(self.questions_url)
+        records = QuestionRecord.objects.filter(id__in=[q["record_id"] for q in res.data["questions"]])
+        question_answer_set = [
+            {"question_record": record, "answer": Answer.objects.get(question=record.question, is_correct=True)}
+            for record in records
+        ]
+
+        gm = GameManager(self.user)
+        results = gm.answer_questions(question_answer_set)
+        self.assertTrue(all(result["is_correct"] for result in results))
+        self.assertFalse(QuestionRecord.objects.filter(user=self.user, is_completed=False).exists())
+
+        # Same records, as validated by a concurrent request before the first one committed
+        with self.assertRaises(ValidationError):
+            gm.answer_questions(question_answer_set)
+
+        self.assertTrue(UserLevelProgressRecord.objects.get(user=self.user, level=self.final_boss_level).is_completed)
+        self.assertEqual(UserLevelProgressRecord.objects.filter(user=self.user, level_id=10).count(), 1)
+
+    def test_normal_question_query_count(self):
+        """
+        Test serving a normal level question resolves the position, points and open records only once.
+        """
+        GameManager(self.teacher).get_user_position_in_world()  # Init the first level
+
+        # position, open records, records, progress, points, points from records, answered set, question pool,
+        # insert, question, answers, level stats
+        with self.assertNumQueries(12):
+            question_list, session_stats = GameManager(self.teacher).get_questions(None)
+            self.assertEqual(len(question_list[0]["answers"]), 4)
+
+        # position, open records, answers, level stats
+        with self.assertNumQueries(4):
+            question_list, session_stats = GameManager(self.teacher).get_questions(None)
+            self.assertEqual(len(question_list[0]["answers"]), 4)
+
+    def test_question_query_count_with_retries(self):
+        """
+        Test the number of queries to serve and grade a normal level question does not grow with the retries of the
+        level.
+        """
+        gm = GameManager(self.teacher)
+        level = gm.get_user_position_in_world()  # Init the first level
+
+        def serve_and_grade():
+            question_list, _ = GameManager(self.teacher).get_questions(None)
+            record = QuestionRecord.objects.get(id=question_list[0]["record_id"])
+            answer = Answer.objects.filter(question=record.question, is_correct=False)[0]
+            with CaptureQueriesContext(connection) as context:
+                GameManager(self.teacher).get_questions(None)
+                GameManager(self.teacher).answer_questions([{"question_record": record, "answer": answer}])
+            return len(context.captured_queries)
+
+        serve_and_grade()  # Creates the score ledger entries
+        query_counts = []
+        for retries in [3, 300]:
+            QuestionRecord.objects.bulk_create([
+                QuestionRecord(user=self.teacher, level=level, question_id=1, is_completed=True, is_correct=False)
+                for i in range(retries)
+            ])
+            query_counts.append(serve_and_grade())
+
+        self.assertEqual(query_counts[0], query_counts[1])
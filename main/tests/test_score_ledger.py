@@ -0,0 +1,97 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils.timezone import localdate
+from rest_framework import status
+
+from main.GameManager import GameManager
+from main.models import QuestionRecord, UserWorldScore, World, UserScoreBucket
+from main.tests.full_setup import FullSetUp
+
+
+class TestScoreLedger(FullSetUp):
+    def test_score_follows_answers(self):
+        """
+        API: /api/score/
+        Test the score ledger is updated as answers are graded and matches the question records.
+        """
+        self.answer_current_question(self.user, True)
+        self.answer_current_question(self.user, False)
+        self.answer_current_question(self.user, True)
+
+        world = World.objects.get(id=1)
+        score = UserWorldScore.objects.get(user=self.user, world=world)
+        expected = sum(QuestionRecord.objects.filter(user=self.user).values_list("points_change", flat=True))
+        self.assertEqual(score.points, expected)
+
+        res = self.client.get("/api/score/")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {"points": expected})
+
+        call_command("rebuild_score_ledger", "--check", stdout=StringIO())
+
+    def test_score_seeded_from_records(self):
+        """
+        Test the score ledger is seeded from existing records when it has no entry yet.
+        """
+        gm = GameManager(self.user)
+        level = gm.get_user_position_in_world()
+        QuestionRecord.objects.create(user=self.user, level=level, question_id=1, is_correct=True, points_change=30)
+
+        self.assertEqual(gm.get_user_points_by_world(level.section.world), 30)
+        self.assertEqual(UserWorldScore.objects.get(user=self.user).points, 30)
+
+    def test_rebuild_command(self):
+        """
+        Test the rebuild command detects and repairs a ledger that drifted from the records.
+        """
+        self.answer_current_question(self.user, True)
+        UserWorldScore.objects.filter(user=self.user).update(points=999)
+
+        with self.assertRaises(CommandError):
+            call_command("rebuild_score_ledger", "--check", stdout=StringIO())
+
+        call_command("rebuild_score_ledger", stdout=StringIO())
+        call_command("rebuild_score_ledger", "--check", stdout=StringIO())
+        self.assertEqual(UserWorldScore.objects.get(user=self.user).points, 10)
+
+    def test_daily_bucket_follows_answers(self):
+        """
+        Test the points of the day are added up in a daily score bucket as answers are graded.
+        """
+        self.answer_current_question(self.user, True)
+        self.answer_current_question(self.user, True)
+
+        bucket = UserScoreBucket.objects.get(user=self.user)
+        self.assertEqual(bucket.period, UserScoreBucket.DAY)
+        self.assertEqual(bucket.start, localdate())
+        self.assertEqual(bucket.points_earned, UserWorldScore.objects.get(user=self.user, world_id=1).points)
+
+    def test_compact_buckets_command(self):
+        """
+        Test older daily buckets are rolled up into weekly buckets, and older weekly buckets into monthly buckets,
+        keeping the total points and the daily buckets of this week.
+        """
+        today = localdate()
+        week_start = today - timedelta(days=today.weekday())
+        old_monday = week_start - timedelta(weeks=10)
+        for day, points in [(today, 1), (week_start - timedelta(days=1), 2), (week_start - timedelta(days=2), 3),
+                            (old_monday, 4), (old_monday + timedelta(days=1), 5)]:
+            UserScoreBucket.objects.create(user=self.user, world_id=1, start=day, points_earned=points)
+
+        call_command("compact_score_buckets", stdout=StringIO())
+        buckets = {(bucket.period, bucket.start): bucket.points_earned
+                   for bucket in UserScoreBucket.objects.filter(user=self.user)}
+        self.assertEqual(buckets, {
+            (UserScoreBucket.DAY, today): 1,
+            (UserScoreBucket.WEEK, week_start - timedelta(weeks=1)): 5,
+            (UserScoreBucket.MONTH, old_monday.replace(day=1)): 9,
+        })
+
+        # Compacting again adds to the buckets already compacted
+        UserScoreBucket.objects.create(user=self.user, world_id=1, start=old_monday + timedelta(days=2),
+                                       points_earned=6)
+        call_command("compact_score_buckets", stdout=StringIO())
+        self.assertEqual(UserScoreBucket.objects.get(user=self.user, period=UserScoreBucket.MONTH).points_earned, 15)
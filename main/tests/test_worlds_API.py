@@ -112,4 +112,55 @@ class TestWorldsAPI(APITestCase):
         response = self.client.get(self.worlds_url + str(self.world3.id) + "/", format="json")
         response_json = response.json()
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response_json["is_custom_world"], False)
\ No newline at end of file
+        self.assertEqual(response_json["is_custom_world"], False)
+
+    def test_worlds_cached_until_changed(self):
+        """
+        API: "api/worlds/" and "api/worlds/:id/
+        Method: GET
+        Expected result: Worlds are served from the cache without any query, until a Section is changed
+        """
+        self.client.get(self.worlds_url, format="json")
+        self.client.get(self.worlds_url + str(self.world1.id) + "/", format="json")
+        with self.assertNumQueries(0):
+            response = self.client.get(self.worlds_url, format="json")
+            self.client.get(self.worlds_url + str(self.world1.id) + "/", format="json")
+        self.assertEqual(response.json()[0]["sections"][0]["sub_topic_name"], "Requirements Elicitation")
+        self.assertEqual(len(response.json()[0]["sections"][0]["levels"]), 3)
+
+        section = Section.objects.get(sub_topic_name="Requirements Elicitation")
+        section.sub_topic_name = "Elicitation"
+        section.save()
+        with self.assertNumQueries(3):  # worlds, sections, levels
+            response = self.client.get(self.worlds_url, format="json")
+        self.assertEqual(response.json()[0]["sections"][0]["sub_topic_name"], "Elicitation")
+        response = self.client.get(self.worlds_url + str(self.world1.id) + "/", format="json")
+        self.assertEqual(response.json()["sections"][0]["sub_topic_name"], "Elicitation")
+
+        response = self.client.get(self.worlds_url + "999/", format="json")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_worlds_not_modified(self):
+        """
+        API: "api/worlds/" and "api/worlds/:id/
+        Method: GET
+        Expected result: 304 without content if the client has the Worlds with the same ETag, until a Level is changed
+        """
+        world_url = self.worlds_url + str(self.world1.id) + "/"
+        etag = self.client.get(self.worlds_url, format="json")["ETag"]
+        world_etag = self.client.get(world_url, format="json")["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.worlds_url, format="json", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+        response = self.client.get(world_url, format="json", HTTP_IF_NONE_MATCH=world_etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Level.objects.filter(section__world=self.world1).first().delete()
+        response = self.client.get(self.worlds_url, format="json", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        response = self.client.get(world_url, format="json", HTTP_IF_NONE_MATCH=world_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -3,6 +3,7 @@ from .views import *
 
 urlpatterns= [
     path('api/leaderboard/', LeaderboardView.as_view()),
+    path('api/leaderboard/export/', LeaderboardExportView.as_view()),
     path('api/worlds/', WorldView.as_view()),
     path('api/worlds/<int:id>/', WorldDetails.as_view()),
     path('api/worlds/custom/', CustomWorldView.as_view()),
@@ -19,7 +20,8 @@ question_urls = [
 
 misc_urls = [
     path('api/score/', UserScore.as_view()),
-    path('api/difficulty/', QuestionDifficulty.as_view())
+    path('api/difficulty/', QuestionDifficulty.as_view()),
+    path('api/state/', GameStateView.as_view()),
 ]
 
 position_urls = [
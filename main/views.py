@@ -1,21 +1,25 @@
 from django.conf.global_settings import AUTHENTICATION_BACKENDS
 from django.contrib.auth import  login, logout
 from django.contrib.auth.password_validation import validate_password
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import render
 from django.template import loader
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
 from rest_framework import viewsets, permissions, status
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.exceptions import ValidationError
 from rest_framework.generics import CreateAPIView, RetrieveAPIView
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 from rest_framework.authtoken.models import Token
 from django.core.exceptions import ValidationError as DjangoValidationError
-from .helper import calculate_world_statistics
+from .helper import calculate_world_statistics, calculate_worlds_statistics
+from .leaderboard import get_ranking, get_student_ranking, get_ranking_page, get_ranking_around, encode_cursor, \
+    decode_cursor, get_cached_leaderboard, get_window_start, iter_ranking_csv, iter_ranking_ndjson
 from .models import *
-from django.db.models import Sum
+from .world_tree import get_campaign_world_tree, get_world_tree, get_worlds_etag
 
 from main.serializers import *
 from main.permissions import IsOwnerOrReadOnly
@@ -147,76 +151,268 @@ class LeaderboardView(APIView):
         GET request handler.
         Retrieves leaderboard, filtered optionally by world_id, user_id, limit, and offset.
         For each student, their total points, first_name, last_name, and rank are returned.
+        - class_id ranks only the students of that class
+        - period ranks only the points earned "day" (today) or "week" (this week)
+        - access_code gives the leaderboard of the custom world with that access code, ranking only the students of the
+        classes it is assigned to
+        - offset is the rank of the first student returned
+        - cursor (empty for the first page) pages through the leaderboard by keyset instead of offset,
+        use the X-Next-Cursor header of the previous page. limit defaults to 10 with a cursor
+        - around_user_id returns the student with the given id and the students ranked around them, window (default 5)
+        sets the number of students on each side
 
         :raises: NotFound: if world_id is specified, and World with that world_id does not exist
-        :raises: NotFound: if user_id is specified, and User with that user_id does not exist
-        :raises: ParseError: if user_id is specified, and the user has not played in Campaign Mode yet or the user is not a Student
+        :raises: NotFound: if class_id is specified, and Class with that class_id does not exist
+        :raises: NotFound: if access_code is specified, and Custom World with that access_code does not exist
+        :raises: ParseError: if both world_id and access_code are specified
+        :raises: ParseError: if period is specified, but it is invalid
+        :raises: NotFound: if user_id or around_user_id is specified, and User with that id does not exist
+        :raises: ParseError: if user_id or around_user_id is specified, and the user has not played in Campaign Mode yet or the user is not a Student
         :raises: ParseError: if offset is specified, but it is invalid
         :raises: ParseError: if limit is specified, but it is invalid
+        :raises: ParseError: if cursor or window is specified, but it is invalid
+        """
+        world, class_ids, since = self.get_scope(request)
+
+        # if user_id specified, return only the ranking of that user
+        # don't need to apply offset/limit in this case
+        user_id = request.query_params.get("user_id")
+        around_user_id = request.query_params.get("around_user_id")
+        if user_id:
+            student = self.get_student(user_id)
+            student_record = get_student_ranking(student.id, world, class_ids, since)
+            if not student_record:
+                raise ParseError(detail="This Student has not started playing Campaign Mode, or the User specified is not a Student.")
+            return Response(LeaderboardSerializer(student_record).data)
+
+        if around_user_id:
+            student = self.get_student(around_user_id)
+            try:
+                window = int(request.query_params.get("window", 5))
+                assert window >= 0
+            except (ValueError, AssertionError):
+                raise ParseError(detail="Invalid window specified")
+            student_points = get_ranking_around(student.id, window, world, class_ids, since)
+            if student_points is None:
+                raise ParseError(detail="This Student has not started playing Campaign Mode, or the User specified is not a Student.")
+            return Response(LeaderboardSerializer(student_points, many=True).data)
+
+        # pages of the leaderboard are cached until a score in it changes
+        offset, limit, cursor = self.get_page_params(request)
+        page = "offset=%s&limit=%s&cursor=%s" % (offset, limit, cursor)
+        data, next_cursor = get_cached_leaderboard(
+            page,
+            lambda: self.get_page(world, class_ids, since, offset, limit, cursor),
+            world,
+            class_ids,
+            since,
+        )
+        response = Response(data)
+        if next_cursor:
+            # there may be more students to page through
+            response["X-Next-Cursor"] = next_cursor
+        return response
+
+    def get_scope(self, request):
+        """
+        Method to retrieve the leaderboard to rank students on, from world_id, class_id, access_code and period.
+        :param request: the request
+        :return: world object (None for the overall campaign leaderboard), ids of the classes to rank the students of
+        (None for all students), and first day of the time window (None for all points)
+        :raises: NotFound: if world_id is specified, and World with that world_id does not exist
+        :raises: NotFound: if class_id is specified, and Class with that class_id does not exist
+        :raises: NotFound: if access_code is specified, and Custom World with that access_code does not exist
+        :raises: ParseError: if both world_id and access_code are specified
+        :raises: ParseError: if period is specified, but it is invalid
         """
         world_id = request.query_params.get("world_id")
-        print(request.META)
+        world = None
         if world_id:  # get leaderboard of a particular world
             try:
                 world = World.objects.get(id=world_id)
             except World.DoesNotExist:
                 raise NotFound(detail="World with specified ID does not exist.")
-            sections = Section.objects.filter(world_id=world)  # get sections in the world
-        else:  # get overall leaderboard of campaign worlds
-            campaign_worlds = World.objects.filter(is_custom_world=False)
-            sections = Section.objects.filter(world__in=campaign_worlds)
-
-        # get records of each question in the world(s)
-        levels = Level.objects.filter(section__in=sections)
-        student_records = QuestionRecord.objects.filter(level__in=levels)
-
-        # sum up points for each student and sort in desc order
-        student_points = student_records.values('user_id', 'user__first_name', 'user__last_name') \
-            .annotate(points=Sum('points_change')).order_by('points').reverse()
-
-        # do cleaning of queryset
-        for i in range(1, len(student_points) + 1):
-            student = student_points[i - 1]
-            student["first_name"] = student.pop("user__first_name")
-            student["last_name"] = student.pop("user__last_name")
-            student["rank"] = i
 
-        # if user_id specified, return only the ranking of that user
-        # don't need to apply offset/limit in this case
-        user_id = request.query_params.get("user_id")
-        if user_id:
+        # rank only the students of a class, or of the classes an assignment is given to
+        class_ids = None
+        class_id = request.query_params.get("class_id")
+        if class_id:
             try:
-                student = User.objects.get(id=user_id)
-            except User.DoesNotExist:
-                raise NotFound(detail="User with specified ID does not exist")
-            student_exists = False
-            for student_record in student_points:
-                if student_record["user_id"] == student.id:
-                    serializer = LeaderboardSerializer(student_record)
-                    student_exists = True
-                    break
-            if not student_exists:
-                raise ParseError(detail="This Student has not started playing Campaign Mode, or the User specified is not a Student.")
+                class_ids = [Class.objects.values_list("id", flat=True).get(id=class_id)]
+            except (Class.DoesNotExist, ValueError):
+                raise NotFound(detail="Class with specified ID does not exist.")
+
+        access_code = request.query_params.get("access_code")
+        if access_code:
+            if world_id:
+                raise ParseError(detail="Specify either world_id or access_code, not both.")
+            try:
+                world = CustomWorld.objects.get(access_code=access_code)
+            except CustomWorld.DoesNotExist:
+                raise NotFound(detail="Custom World with specified access code does not exist.")
+            # a challenge world without assignments ranks everyone who played it
+            assigned_class_ids = list(
+                Assignment.objects.filter(custom_world=world).values_list("class_group_id", flat=True)
+            )
+            if assigned_class_ids:
+                if class_ids is None:
+                    class_ids = assigned_class_ids
+                else:
+                    class_ids = [assigned_id for assigned_id in assigned_class_ids if assigned_id in class_ids]
+
+        # rank only the points earned within a time window
+        since = None
+        period = request.query_params.get("period")
+        if period:
+            try:
+                since = get_window_start(period)
+            except ValueError:
+                raise ParseError(detail="Invalid period specified")
+
+        return world, class_ids, since
+
+    def get_page_params(self, request):
+        """
+        Method to retrieve the page of the leaderboard to return, from offset, limit and cursor.
+        :param request: the request
+        :return: offset (rank of the first student, None for the first rank), limit (number of students, None for all
+        students) and cursor (cursor of the last student of the previous page, "" for the first page, None to use offset
+        instead), validated and normalized
+        :raises: ParseError: if offset, limit or cursor is invalid
+        """
+        offset = request.query_params.get("offset")
+        limit = request.query_params.get("limit")
+        cursor = request.query_params.get("cursor")
+        if cursor is not None:
+            # keyset pagination
+            try:
+                after = decode_cursor(cursor) if cursor else None
+            except ValueError:
+                raise ParseError(detail="Invalid cursor specified")
+            try:
+                limit = int(limit) if limit else api_settings.PAGE_SIZE
+                assert limit > 0
+            except (ValueError, AssertionError):
+                raise ParseError(detail="Invalid limit applied")
+            return None, limit, "%s:%s:%s" % after if after else ""
+
+        if offset:
+            try:
+                offset = int(offset)
+                assert offset > 0
+            except (ValueError, AssertionError):
+                raise ParseError(detail="Invalid offsets specified")
         else:
-            # apply offset, if any
-            offset = request.query_params.get("offset")
-            if offset:
-                try:
-                    student_points = student_points[int(offset) - 1:]
-                except (ValueError, AssertionError):
-                    raise ParseError(detail="Invalid offsets specified")
-
-            # apply limit, if any
-            limit = request.query_params.get("limit")
-            if limit:
-                try:
-                    student_points = student_points[:int(limit)]
-                except (ValueError, AssertionError):
-                    raise ParseError(detail="Invalid limit applied")
-
-            serializer = LeaderboardSerializer(student_points, many=True)
+            offset = None
+        if limit:
+            try:
+                limit = int(limit)
+                assert limit >= 0
+            except (ValueError, AssertionError):
+                raise ParseError(detail="Invalid limit applied")
+        else:
+            limit = None
+        return offset, limit, None
 
-        return Response(serializer.data)
+    def get_page(self, world, class_ids, since, offset, limit, cursor):
+        """
+        Method to build a page of the leaderboard.
+        :param world: the world object, None for the overall campaign leaderboard
+        :param class_ids: ids of the classes to rank the students of, None to rank all students
+        :param since: first day of the time window to rank the points earned in, None to rank all points
+        :param offset: rank of the first student, None for the first rank
+        :param limit: number of students, None for all students
+        :param cursor: cursor of the last student of the previous page, "" for the first page, None to use offset instead
+        :return: serialized students, and the cursor of the next page if there may be one
+        """
+        if cursor is not None:
+            # keyset pagination
+            after = decode_cursor(cursor) if cursor else None
+            student_points = get_ranking_page(limit, after, world, class_ids, since)
+        else:
+            # students sorted by points in desc order, from the score ledger
+            student_points = get_ranking(world, class_ids, since)
+
+            # offset is the rank of the first student returned
+            start = offset - 1 if offset else 0
+            if limit is not None:
+                student_points = student_points[start:start + limit]
+            else:
+                student_points = student_points[start:]
+
+            student_points = list(student_points)
+            for rank, student in enumerate(student_points, start=start + 1):
+                student["rank"] = rank
+
+        next_cursor = None
+        if limit and len(student_points) == limit:
+            next_cursor = encode_cursor(student_points[-1])
+        serializer = LeaderboardSerializer(student_points, many=True)
+        return serializer.data, next_cursor
+
+    def get_student(self, user_id):
+        """
+        Method to retrieve a User.
+        :param user_id: id of the User
+        :return: User if id exists
+        :raises: NotFound if id does not exist or is not a number
+        """
+        try:
+            return User.objects.get(id=user_id)
+        except (User.DoesNotExist, ValueError):
+            raise NotFound(detail="User with specified ID does not exist")
+
+
+class LeaderboardExportView(LeaderboardView):
+    """
+    API for teachers to export a leaderboard.
+    Requests handled: GET
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        """
+        GET request handler.
+        Exports the whole leaderboard, filtered optionally like the leaderboard by world_id, class_id, access_code and
+        period. For each student, their rank, user_id, first_name, last_name, and total points are returned.
+        - output is "csv" (default) or "ndjson" for newline-delimited JSON
+        The students are streamed as they are read, so the export does not hold the whole leaderboard in memory.
+
+        :raises: NotFound: if world_id, class_id or access_code is specified, and it does not exist
+        :raises: ParseError: if both world_id and access_code are specified
+        :raises: ParseError: if period is specified, but it is invalid
+        :raises: ParseError: if output is specified, but it is invalid
+        """
+        world, class_ids, since = self.get_scope(request)
+
+        output = request.query_params.get("output", "csv")
+        if output == "csv":
+            rows = iter_ranking_csv(world, class_ids, since)
+            content_type = "text/csv"
+        elif output == "ndjson":
+            rows = iter_ranking_ndjson(world, class_ids, since)
+            content_type = "application/x-ndjson"
+        else:
+            raise ParseError(detail="Invalid output specified")
+
+        response = StreamingHttpResponse(rows, content_type=content_type)
+        response["Content-Disposition"] = 'attachment; filename="leaderboard.%s"' % output
+        return response
+
+
+def conditional_response(request, etag, get_response):
+    """
+    Answers 304 Not Modified if the client already has the content with this ETag (If-None-Match), without building
+    the response.
+    :param etag: strong ETag of the content
+    :param get_response: function building the response with the content
+    :return: the response, with its ETag
+    """
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = get_response()
+    response["ETag"] = etag
+    return response
 
 
 class WorldView(APIView):
@@ -228,11 +424,10 @@ class WorldView(APIView):
     def get(self, request):
         """
         GET request handler
-        :return: Details of all World objects
+        :return: Details of all World objects, pre-rendered, or 304 if unchanged
         """
-        worlds = World.objects.filter(is_custom_world=False)
-        serializer = WorldSerializer(worlds, many=True)
-        return Response(serializer.data)
+        content, etag = get_campaign_world_tree()
+        return conditional_response(request, etag, lambda: HttpResponse(content, content_type="application/json"))
 
 
 class WorldDetails(APIView):
@@ -241,27 +436,18 @@ class WorldDetails(APIView):
     Requests handled: GET
     """
 
-    def get_object(self, id):
-        """
-        Method to retrieve a World object.
-        :param id: Id of World object to retrieve
-        :return: World if Id exists
-        :raises: NotFound if Id does not exist
-        """
-        try:
-            return World.objects.get(id=id)
-        except World.DoesNotExist:
-            raise NotFound("World with specified ID does not exist")
-
     def get(self, request, id):
         """
         GET request handler.
         :param id: Id of World object to retrieve
-        :return: Details of World object with specified Id
+        :return: Details of World object with specified Id, pre-rendered, or 304 if unchanged
+        :raises: NotFound if Id does not exist
         """
-        world = self.get_object(id)
-        serializer = WorldSerializer(world)
-        return Response(serializer.data)
+        tree = get_world_tree(id)
+        if tree is None:
+            raise NotFound("World with specified ID does not exist")
+        content, etag = tree
+        return conditional_response(request, etag, lambda: HttpResponse(content, content_type="application/json"))
 
 
 class UserScore(APIView):
@@ -306,6 +492,24 @@ class QuestionDifficulty(APIView):
         return Response(res)
 
 
+def serialize_question_list(question_list):
+    """
+    Serializes the questions returned by the GameManager, without showing the correct answers
+    """
+    res = []
+    for question in question_list:
+        question_serializer = QuestionSerializer(question['question'])
+        answers_serializer = AnswerWithoutCorrectShownSerializer(question["answers"], many=True)
+        temp = {
+            "question": question_serializer.data['question'],
+            "answers": answers_serializer.data,
+            "record_id": question['record_id'],
+            "index": question['index'],
+        }
+        res.append(temp)
+    return res
+
+
 class QuestionView(APIView):
     """
     API endpoint to get question
@@ -318,20 +522,10 @@ class QuestionView(APIView):
 
         question_list, session_stats = gm.get_questions(serializer.validated_data['world'])
         res = {
-            "questions": [],
+            "questions": serialize_question_list(question_list),
             "score": session_stats[0],
             "correct_counter": session_stats[1]
         }
-        for question in question_list:
-            question_serializer = QuestionSerializer(question['question'])
-            answers_serializer = AnswerWithoutCorrectShownSerializer(question["answers"], many=True)
-            temp = {
-                "question": question_serializer.data['question'],
-                "answers": answers_serializer.data,
-                "record_id": question['record_id'],
-                "index": question['index'],
-            }
-            res["questions"].append(temp)
 
         return Response(res)
 
@@ -484,12 +678,12 @@ class CustomWorldView(APIView):
     def get(self, request):
         """
         GET request handler.
-        :return: details of Custom Worlds created by the User
+        :return: details of Custom Worlds created by the User, or 304 if unchanged
         """
         user = self.get_user(request.user.id)
         user_custom_worlds = CustomWorld.objects.filter(created_by=user)
-        serializer = CustomWorldSerializer(user_custom_worlds, many=True)
-        return Response(serializer.data)
+        return conditional_response(request, get_worlds_etag(user_custom_worlds),
+                                    lambda: Response(CustomWorldSerializer(user_custom_worlds, many=True).data))
 
     def post(self, request):
         """
@@ -557,7 +751,7 @@ class CustomWorldDetails(APIView):
         - if type is 'assignment', this method will check if the Assignment associated with the Custom World has expired
          or if the requesting User is allowed to access the Assignment
         :param access_code: access code of Custom World to retrieve
-        :return: details of the specified Custom World
+        :return: details of the specified Custom World, or 304 if unchanged
         :raises: ParseError if the Assignment has expired or the requesting User does not have access to the Assignment
         """
         custom_world_type = request.query_params.get("type")
@@ -574,8 +768,8 @@ class CustomWorldDetails(APIView):
                     raise ParseError(detail="The assignment has expired.")
             except Assignment.DoesNotExist:
                 raise ParseError(detail="You do not have access to this assignment.")
-        serializer = CustomWorldSerializer(custom_world)
-        return Response(serializer.data)
+        return conditional_response(request, get_worlds_etag(CustomWorld.objects.filter(id=custom_world.id)),
+                                    lambda: Response(CustomWorldSerializer(custom_world).data))
 
     def put(self, request, access_code):
         """
@@ -626,6 +820,36 @@ class GetPositionView(APIView):
         return Response(res)
 
 
+class GameStateView(APIView):
+    """
+    API endpoint to get user current position, score, difficulty and session stats in world, all at once.
+    Accepts include_questions=true as a query param to also get the unanswered questions of the current level.
+    """
+    def get(self, request):
+        user = request.user
+        gm = GameManager(user)
+        serializer = WorldValidateSerializer(data=request.GET)
+        serializer.is_valid(raise_exception=True)
+        include_questions = request.query_params.get("include_questions", "").lower() in ("1", "true")
+
+        state = gm.get_state(serializer.validated_data['world'], include_questions=include_questions)
+        position = state["position"]
+        res = {
+            "world_id": position.section.world.id,
+            "section_id": position.section.id,
+            "level_id": position.id,
+            "has_completed": state["has_completed_world"],
+            "points": state["points"],
+            "difficulty_id": state["difficulty"],
+            "difficulty_text": dict(Question.DIFFICULTY_CHOICES).get(state["difficulty"], "Unknown"),
+            "score": state["session_stats"][0],
+            "correct_counter": state["session_stats"][1],
+        }
+        if include_questions:
+            res["questions"] = serialize_question_list(state["question_list"])
+        return Response(res)
+
+
 class CampaignStatisticsView(APIView):
     """
     API endpoint for retrieving Campaign Mode statistics
@@ -637,12 +861,10 @@ class CampaignStatisticsView(APIView):
         - Per World in Campaign Mode, retrieve the average score (gained per Question in the Section) and total score per Section
         - Per Section, display each Question and the number of times it was answered correctly and incorrectly
         """
-        campaign_mode_stats = []  # array of worlds and their stats
         campaign_worlds = World.objects.filter(is_custom_world=False)
         class_name = request.query_params.get("class")
 
-        for world in campaign_worlds:
-            campaign_mode_stats.append(calculate_world_statistics(world, class_name))
+        campaign_mode_stats = calculate_worlds_statistics(campaign_worlds, class_name)
 
         context = {"campaign_mode_stats": campaign_mode_stats}
         if class_name:
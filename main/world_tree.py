@@ -0,0 +1,79 @@
+from hashlib import sha1
+
+from django.core.cache import cache
+from django.db.models import Prefetch, Count, Max, Min
+from rest_framework.renderers import JSONRenderer
+
+from main.cache_versions import get_cache_version, get_cache_version_timeout
+from main.models import World, Section
+from main.serializers import WorldSerializer
+
+WORLD_TREE_CACHE_NAME = "world_tree"
+
+
+def _get_worlds():
+    # Worlds with their Sections and Levels in three queries
+    return World.objects.prefetch_related(Prefetch('sections', queryset=Section.objects.prefetch_related('levels')))
+
+
+def _get_etag(content):
+    return '"%s"' % sha1(content).hexdigest()
+
+
+def _get_cached(name, build):
+    key = "%s:%s:%s" % (WORLD_TREE_CACHE_NAME, get_cache_version(WORLD_TREE_CACHE_NAME), name)
+    tree = cache.get(key)
+    if tree is None:
+        content = build()
+        if content is None:
+            return None
+        tree = (content, _get_etag(content))
+        cache.set(key, tree, timeout=get_cache_version_timeout())
+    return tree
+
+
+def get_worlds_etag(worlds):
+    """
+    Returns a strong ETag for Worlds serialized with their Sections and Levels, without serializing them. It changes
+    whenever one of them is saved (latest date_modified), added or deleted (number of each).
+    :param worlds: queryset of the Worlds
+    :return: the ETag
+    """
+    subtree = worlds.aggregate(
+        worlds=Count('id', distinct=True),
+        first_world=Min('id'),
+        last_world=Max('id'),
+        sections=Count('sections', distinct=True),
+        levels=Count('sections__levels', distinct=True),
+        world_modified=Max('date_modified'),
+        section_modified=Max('sections__date_modified'),
+        level_modified=Max('sections__levels__date_modified'),
+    )
+    return _get_etag(repr(sorted(subtree.items())).encode())
+
+
+def get_campaign_world_tree():
+    """
+    Returns the Campaign Mode Worlds with their Sections and Levels, as serialized by WorldSerializer and rendered to
+    JSON. Rendered once, then served from the cache until a World, Section or Level changes.
+    :return: bytes of the JSON list of the Worlds, and their ETag
+    """
+    def build():
+        worlds = _get_worlds().filter(is_custom_world=False)
+        return JSONRenderer().render(WorldSerializer(worlds, many=True).data)
+    return _get_cached("campaign", build)
+
+
+def get_world_tree(world_id):
+    """
+    Returns a World with its Sections and Levels, as serialized by WorldSerializer and rendered to JSON.
+    Rendered once, then served from the cache until a World, Section or Level changes.
+    :param world_id: id of the World
+    :return: bytes of the JSON World and its ETag, or None if there is no World with this id
+    """
+    def build():
+        world = _get_worlds().filter(id=world_id).first()
+        if world is None:
+            return None
+        return JSONRenderer().render(WorldSerializer(world).data)
+    return _get_cached("world:%s" % world_id, build)
@@ -63,7 +63,7 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'rest_framework',
     'rest_framework.authtoken',
-    'main',
+    'main.apps.MainConfig',
     'django.contrib.admindocs'
 ]
 
@@ -134,6 +134,23 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.1/topics/cache/
+# Invalidation stamps of cached game data (e.g. the level progression graph, the world tree) are kept here.
+# Set CACHE_BACKEND and CACHE_LOCATION to a backend shared by all processes (e.g. memcached) when running more than one.
+# With the default cache local to each process, stamps expire after CACHE_VERSION_TIMEOUT seconds, so that processes
+# still pick up the changes made by another process within this delay. With a shared backend, they never expire.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv("CACHE_BACKEND", 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv("CACHE_LOCATION", ''),
+    }
+}
+
+CACHE_VERSION_TIMEOUT = int(os.getenv("CACHE_VERSION_TIMEOUT", 60))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
 